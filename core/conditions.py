@@ -29,6 +29,7 @@ from core.config import Config
 from core.statsmanager import StatsManager
 from core.log import CustomLogger
 from core.timeutilities import TimeUtilities
+from powerconsumption.loadprofile import LoadProfile
 from spotmarket.abstract_classes.item import Item
 from datetime import datetime, timedelta, timezone
 from essunit.abstract_classes.essunit import ESSUnit
@@ -77,8 +78,7 @@ class Conditions:
                 formatted_price = str(lowest_prices_count)
 
             # Trenne die Items in "heute" und "morgen"
-            today_items = [item for item in result if self.items.is_today_or_tomorrow(item) == 'today']
-            tomorrow_items = [item for item in result if self.items.is_today_or_tomorrow(item) == 'tomorrow']
+            today_items, tomorrow_items = self.items.split_by_day(result)
 
             # Logge die Items für heute
             if today_items:
@@ -87,7 +87,7 @@ class Conditions:
                 for item in today_items:
                     price = item.get_price(True)
                     start_time = item.get_start_datetime(True)
-                    if float(price) > hard_cap:
+                    if item.get_price(False) > self.charging_price_hard_cap:
                         self.logger.log_info(
                             f"..... Time: {start_time}, Price: {price} Cent/kWh ... exceeds hard cap limit of {hard_cap:.4f} Cent/kWh"
                         )
@@ -113,8 +113,7 @@ class Conditions:
                 formatted_price = str(highest_prices_count)
 
             # Trenne die Items in "heute" und "morgen"
-            today_items = [item for item in result if self.items.is_today_or_tomorrow(item) == 'today']
-            tomorrow_items = [item for item in result if self.items.is_today_or_tomorrow(item) == 'tomorrow']
+            today_items, tomorrow_items = self.items.split_by_day(result)
 
             # Logge die Items für heute
             if today_items:
@@ -275,7 +274,7 @@ class Conditions:
             try:
                 result = condition_function()
                 self.logger.log_debug(
-                    f"Evaluating condition: {condition_key} - Result: {result}")
+                    "Evaluating condition: %s - Result: %s", condition_key, result)
             except Exception as e:
                 self.logger.log_error(
                     f"Error while evaluating condition: {e}")
@@ -299,7 +298,7 @@ class Conditions:
             try:
                 result = condition_function()
                 self.logger.log_debug(
-                    f"Evaluating abort condition: {condition_key} - Result: {result}")
+                    "Evaluating abort condition: %s - Result: %s", condition_key, result)
             except Exception as e:
                 self.logger.log_error(
                     f"Error while evaluating abort condition: {e}")
@@ -309,15 +308,21 @@ class Conditions:
                 condition_result.condition = condition_key
                 break
 
-    def _calculate_required_capacity(self, upcoming_hours):
+    def _calculate_required_capacity(self, upcoming_hours, start=None):
         average_consumption = 0.0
         average_consumption_list = StatsManager.get_data('gridmeters', 'forward_hourly')
         if average_consumption_list is not None:
             average_consumption = round(average_consumption_list[0], 2)
 
-        # Calculate the required capacity based on the number of upcoming high-price periods
-        required_capacity = upcoming_hours * average_consumption * 1.10  # Add 10% buffer - Multiply by average hourly consumption
-        self.logger.log_debug(f"Required capacity: {required_capacity:.2f} Wh")
+        if start is not None:
+            # Erwarteter Verbrauch laut Wochenprofil, unbekannte Stunden mit dem Stundendurchschnitt
+            expected_consumption = LoadProfile.get_expected_wh(
+                start, start + timedelta(hours=upcoming_hours), average_consumption)
+        else:
+            expected_consumption = upcoming_hours * average_consumption
+
+        required_capacity = expected_consumption * 1.10  # Add 10% buffer
+        self.logger.log_debug("Required capacity: %.2f Wh", required_capacity)
         return required_capacity
 
     def _calculate_current_soc_wh(self):
@@ -358,7 +363,10 @@ class Conditions:
     def _calculate_available_surplus(self, upcoming_high_prices):
         current_soc_wh, akkukapazitaet_wh, min_soc_wh = self._calculate_current_soc_wh()
 
-        required_capacity = self._calculate_required_capacity(len(upcoming_high_prices))
+        # Calculate the required capacity over the upcoming high-price periods
+        required_capacity = sum(
+            self._calculate_required_capacity(self._get_item_hours(item), item.get_start_datetime())
+            for item in upcoming_high_prices)
 
         # Add a 10% buffer to the required capacity to maintain a safety margin
         buffer = 0.10 * current_soc_wh
@@ -368,11 +376,16 @@ class Conditions:
         self.available_surplus = max(0, self.available_surplus)  # Ensure surplus is not negative
 
         self.logger.log_debug(
-            f"Current SOC: {current_soc_wh:.2f} Wh, Min SOC: {min_soc_wh:.2f} Wh, Buffer: {buffer:.2f} Wh")
-        self.logger.log_debug(f"Available Surplus: {self.available_surplus:.2f} Wh")
+            "Current SOC: %.2f Wh, Min SOC: %.2f Wh, Buffer: %.2f Wh", current_soc_wh, min_soc_wh, buffer)
+        self.logger.log_debug("Available Surplus: %.2f Wh", self.available_surplus)
 
         return current_soc_wh, min_soc_wh, required_capacity
 
+    @staticmethod
+    def _get_item_hours(item):
+        end = item.get_end_epoch()
+        return (end + 1 - item.get_start_epoch()) / 3600 if end is not None else 1
+
     def _calculate_discharge_conditions(self, upcoming_high_prices):
         """Helper function to encapsulate the discharge calculation logic."""
 
@@ -382,7 +395,7 @@ class Conditions:
 
             # Calculate the maximum dischargeable amount without falling below the required capacity
             max_dischargeable_amount = current_soc_wh - (required_capacity + min_soc_wh)
-            self.logger.log_debug(f"Max Dischargeable Amount: {max_dischargeable_amount:.2f} Wh")
+            self.logger.log_debug("Max Dischargeable Amount: %.2f Wh", max_dischargeable_amount)
 
             if max_dischargeable_amount < 0:
                 return False  # Not enough SOC for future high prices, discharging not allowed
@@ -432,7 +445,7 @@ class Conditions:
         if current_time < sunset:
             remaining_until_sunset = (sunset - current_time).total_seconds() / 3600
             remaining_description = f"/ remaining until sunset: {remaining_until_sunset:.2f} hour"
-            required_capacity += self._calculate_required_capacity(remaining_until_sunset)
+            required_capacity += self._calculate_required_capacity(remaining_until_sunset, current_time)
 
         # Nach Sonnenuntergang
         elif current_time >= sunset:
@@ -440,7 +453,7 @@ class Conditions:
             if current_time < midnight:
                 remaining_until_midnight = (midnight - current_time).total_seconds() / 3600  # Stunden bis Mitternacht
                 remaining_description = f"/ remaining until midnight: {remaining_until_midnight:.2f} hour"
-                required_capacity += self._calculate_required_capacity(remaining_until_midnight)
+                required_capacity += self._calculate_required_capacity(remaining_until_midnight, current_time)
 
             # Ab Mitternacht bis Sonnenaufgang
             if midnight <= current_time < sunrise:
@@ -453,7 +466,7 @@ class Conditions:
             remaining_until_next_sunrise = (sunrise + timedelta(days=1) - current_time).total_seconds() / 3600
             remaining_description = f"/ remaining until next sunrise: {remaining_until_next_sunrise:.2f} hour"
 
-            required_capacity += self._calculate_required_capacity(remaining_until_next_sunrise)
+            required_capacity += self._calculate_required_capacity(remaining_until_next_sunrise, current_time)
 
         # Ausgabe des Logs mit benötigter Kapazität und aktuellem SOC
         self.logger.log_info(
@@ -480,7 +493,7 @@ class Conditions:
         # Schritt 2: Berechne aktuelle Ladegeschwindigkeit
         statsmanager = StatsManager()
         initial_charge_state_wh = statsmanager.get_data('Energy', "initial_charge_state_wh") or 0.0  # Umbenannt
-        self.logger.log_debug(f"Initial charge state wh: {initial_charge_state_wh:.2f} Wh")
+        self.logger.log_debug("Initial charge state wh: %.2f Wh", initial_charge_state_wh)
         hourly_loaded_wh = 0.0
         if initial_charge_state_wh > 0.0:
             minute = now.minute
@@ -490,14 +503,14 @@ class Conditions:
 
             current_loaded_wh = (self.essunit.get_battery_current_wh() - initial_charge_state_wh) / minute
             hourly_loaded_wh = current_loaded_wh * 60
-            self.logger.log_debug(f"Current loaded Wh per minute: {current_loaded_wh:.2f} Wh")
-            self.logger.log_debug(f"Projected loaded Wh per hour: {hourly_loaded_wh:.2f} Wh")
+            self.logger.log_debug("Current loaded Wh per minute: %.2f Wh", current_loaded_wh)
+            self.logger.log_debug("Projected loaded Wh per hour: %.2f Wh", hourly_loaded_wh)
 
         # Schritt 3: Berechne, wie viel Kapazität benötigt wird
         max_soc = self.essunit.get_scheduler_soc() / 100
         installed_capacity_wh = self.essunit.get_battery_installed_capacity() * 55.2
         required_capacity_wh = max(0, (installed_capacity_wh * max_soc) - self.essunit.get_battery_current_wh())
-        self.logger.log_debug(f"Required capacity: {required_capacity_wh:.2f} Wh")
+        self.logger.log_debug("Required capacity: %.2f Wh", required_capacity_wh)
 
         # Schritt 4: Prüfe auf aufeinanderfolgende Stunden und berechne mögliche Kapazität
         consecutive_hours = []
@@ -515,7 +528,7 @@ class Conditions:
 
         # Berechne die mögliche Ladekapazität basierend auf aufeinanderfolgenden Stunden
         max_energy_possible = len(consecutive_hours) * hourly_loaded_wh
-        self.logger.log_debug(f"Max energy possible with consecutive hours: {max_energy_possible:.2f} Wh")
+        self.logger.log_debug("Max energy possible with consecutive hours: %.2f Wh", max_energy_possible)
 
         # Schritt 5: Überprüfe Abbruchbedingung
         if max_energy_possible >= required_capacity_wh:
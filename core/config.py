@@ -50,6 +50,7 @@ class Config(Singleton):
         "time_zone": "Europe/Vienna",
         "log_file_path": "/tmp/seuss.log",
         "log_level": "INFO",
+        "log_async": False,
         "use_solar_forecast_to_abort": False,
         "prices": [
             {
@@ -148,6 +149,7 @@ class Config(Singleton):
 
             self.log_file_path = ""
             self.log_level = "INFO"
+            self.log_async = False
             self.failback_market = ""
             self.config_data = {}
             self.markets = []
@@ -189,6 +191,7 @@ class Config(Singleton):
         self.config_data = config_data
         self.log_file_path = config_data.get("log_file_path", "")
         self.log_level = config_data.get("log_level", "INFO")
+        self.log_async = config_data.get("log_async", False)
 
         if not os.path.exists(self.log_file_path):
             # touch
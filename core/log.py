@@ -25,17 +25,42 @@
 #  Project: [SEUSS -> Smart Ess Unit Spotmarket Switcher
 #
 
-import inspect
+import atexit
 import os
+import queue
+import sys
 
 import logging
 import logzero
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from logzero import logger
 
 from core.config import Config
 from design_patterns.singleton import Singleton
 
 
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler mit begrenzter Queue: ist sie voll, wird der Eintrag verworfen statt zu blockieren."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.unreported = 0
+
+    def enqueue(self, record):
+        try:
+            if self.unreported:
+                # Verworfene Einträge im Log vermerken, sobald wieder Platz ist
+                self.queue.put_nowait(logging.LogRecord(
+                    record.name, logging.WARNING, record.pathname, record.lineno,
+                    f"Log queue full, {self.unreported} log records dropped", None, None))
+                self.unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self.unreported += 1
+
+
 class CustomLogger(Singleton):
     RESET = "\x1b[0m"
     BRIGHT = "\x1b[1m"
@@ -52,6 +77,9 @@ class CustomLogger(Singleton):
             self.config = Config()
             self.config.observer.add_observer("CustomLogger", self)
             self.log_level = self.config.log_level
+            self.log_listener = None
+            self.log_queue_handler = None
+            atexit.register(self.stop_log_queue)
 
             self.handle_config_update(self.config.config_data)
             # Setze den Log-Level für die Konsole
@@ -61,7 +89,10 @@ class CustomLogger(Singleton):
             self.initialized = True
 
     def handle_config_update(self, config_data):
+        # Eine laufende Queue zuerst leeren, logzero.logfile ersetzt danach die Handler
+        self.stop_log_queue()
         self.log_level = self.config.log_level
+        self.show_caller = self.log_level.upper() == "DEBUG"
         if os.path.exists('/data/rc.local'):
             logzero.setup_default_logger(disableStderrLogger=True)
         # Setze den Log-Level für die Datei
@@ -75,29 +106,87 @@ class CustomLogger(Singleton):
             loglevel=logging.getLevelName(self.config.log_level.upper())
         )
 
+        if self.config.log_async:
+            self.start_log_queue()
+
         print("CustomLogger is handling configuration change.")
 
-    def format_message(self, message, log_level):
-        if self.log_level.upper() != "DEBUG" or log_level != "DEBUG":
+    def start_log_queue(self, maxsize=10000):
+        """Moves the file handler behind a bounded queue, a background thread writes and rotates the log file."""
+        file_handlers = [handler for handler in logger.handlers if isinstance(handler, RotatingFileHandler)]
+        if not file_handlers:
+            return
+
+        for handler in file_handlers:
+            logger.removeHandler(handler)
+
+        self.log_queue_handler = BoundedQueueHandler(queue.Queue(maxsize))
+        self.log_queue_handler.setLevel(min(handler.level for handler in file_handlers))
+        # Bewusst nicht als logzero-Handler markiert: logzero.logfile entfernt nur seine eigenen RotatingFileHandler,
+        # handle_config_update baut die Queue deshalb vor jeder Neukonfiguration mit stop_log_queue ab
+        logger.addHandler(self.log_queue_handler)
+
+        self.log_listener = QueueListener(self.log_queue_handler.queue, *file_handlers, respect_handler_level=True)
+        self.log_listener.start()
+
+    def stop_log_queue(self):
+        if self.log_listener is None:
+            return
+
+        logger.removeHandler(self.log_queue_handler)
+        # stop() schreibt noch alle Einträge aus der Queue
+        self.log_listener.stop()
+
+        unreported = self.log_queue_handler.unreported
+        if unreported:
+            # Noch nicht vermerkte verworfene Einträge direkt über die Datei-Handler protokollieren
+            record = logging.LogRecord(logger.name, logging.WARNING, __file__, sys._getframe().f_lineno,
+                                       "Log queue full, %s log records dropped", (unreported,), None)
+            for handler in self.log_listener.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+        for handler in self.log_listener.handlers:
+            handler.close()
+
+        self.log_listener = None
+        self.log_queue_handler = None
+
+    def get_dropped_log_records(self):
+        return self.log_queue_handler.dropped if self.log_queue_handler else 0
+
+    def format_message(self, message, log_level, stacklevel=2):
+        if log_level != "DEBUG" or not self.show_caller:
             return message
 
-        caller_frame = inspect.stack()[2]
-        script_name = os.path.basename(caller_frame[1])
-        function_name = caller_frame[3]
+        # Nur den benötigten Frame holen, inspect.stack() würde den ganzen Stack samt Quelltext auflösen
+        caller_frame = sys._getframe(stacklevel)
+        script_name = os.path.basename(caller_frame.f_code.co_filename)
+        function_name = caller_frame.f_code.co_name
 
         #        formatted_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         #        formatted_message = f"{formatted_date} [{log_level}] {script_name}/{function_name}: {message}"
         formatted_message = f"[{script_name}/{function_name}]: {message}"
         return formatted_message
 
-    def log_info(self, message):
-        logger.info(self.format_message(message, "INFO"))
+    @staticmethod
+    def is_debug_enabled():
+        return logger.isEnabledFor(logging.DEBUG)
+
+    # Optionale args werden wie beim logging-Modul erst bei der Ausgabe mit % eingesetzt,
+    # bei log_debug darf message auch ein Callable sein, das nur bei aktivem DEBUG aufgerufen wird
+    def log_info(self, message, *args):
+        logger.info(self.format_message(message, "INFO"), *args)
 
-    def log_debug(self, message):
-        logger.debug(self.format_message(message, "DEBUG"))
+    def log_debug(self, message, *args):
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        if callable(message):
+            message = message()
+        logger.debug(self.format_message(message, "DEBUG"), *args)
 
-    def log_error(self, message):
-        logger.error(self.format_message(message, "ERROR"))
+    def log_error(self, message, *args):
+        logger.error(self.format_message(message, "ERROR"), *args)
 
-    def log_warning(self, message):
-        logger.warning(self.format_message(message, "WARNING"))
+    def log_warning(self, message, *args):
+        logger.warning(self.format_message(message, "WARNING"), *args)
@@ -1,53 +1,180 @@
+import os
+import threading
+from collections import deque
+
 from core.config import Config
 from core.utils import Utils
 
 
+class LogTail:
+    """Follows a log file incrementally, only newly appended bytes are read. Survives log rotation."""
+    instances = {}
+    lock = threading.Lock()
+
+    def __init__(self, log_file_path, max_lines=20000):
+        self.log_file_path = log_file_path
+        self.file = None
+        self.inode = None
+        self.offset = 0
+        self.partial = b""
+        self.lines = deque(maxlen=max_lines)  # Zeilen seit der letzten "started..." Zeile
+        self.first_index = 0  # Laufende Nummer der ersten Zeile in self.lines
+        self.session = 0  # Wird bei jedem "started..." erhöht, ältere Cursor sind dann ungültig
+        self.error = None
+        self.condition = threading.Condition()
+
+    @classmethod
+    def get_instance(cls, log_file_path):
+        with cls.lock:
+            tail = cls.instances.get(log_file_path)
+            if tail is None:
+                tail = LogTail(log_file_path)
+                cls.instances[log_file_path] = tail
+            return tail
+
+    @property
+    def next_index(self):
+        return self.first_index + len(self.lines)
+
+    def poll(self):
+        """Reads everything appended since the last call, returns the number of new lines."""
+        with self.condition:
+            try:
+                count = self._read_new_lines()
+                self.error = None
+            except FileNotFoundError:
+                self.error = "Log file not found."
+                count = 0
+            except Exception as e:
+                self.error = f"Error reading log file: {e}"
+                count = 0
+
+            if count:
+                self.condition.notify_all()
+            return count
+
+    def _read_new_lines(self):
+        count = 0
+        if self.file is not None:
+            count += self._read_available()
+            try:
+                rotated = os.stat(self.log_file_path).st_ino != self.inode
+            except FileNotFoundError:
+                rotated = True
+
+            if not rotated:
+                return count
+
+            # Die alte Datei wurde rotiert und ist oben bereits fertig gelesen
+            self._close()
+
+        self.file = open(self.log_file_path, 'rb')
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.offset = 0
+        return count + self._read_available()
+
+    def _read_available(self):
+        if os.fstat(self.file.fileno()).st_size < self.offset:
+            # Datei wurde abgeschnitten
+            self.offset = 0
+            self.partial = b""
+
+        self.file.seek(self.offset)
+        data = self.file.read()
+        if not data:
+            return 0
+
+        self.offset += len(data)
+        data = self.partial + data
+        complete, separator, self.partial = data.rpartition(b"\n")
+        if not separator:
+            return 0
+
+        count = 0
+        for line in complete.decode('utf-8', errors='replace').split("\n"):
+            line += "\n"
+            if line.strip().endswith("started..."):
+                # Neuer Programmstart: nur die Zeilen ab hier anzeigen
+                self.first_index = self.next_index
+                self.lines.clear()
+                self.session += 1
+            elif len(self.lines) == self.lines.maxlen:
+                self.first_index += 1
+            self.lines.append(line)
+            count += 1
+        return count
+
+    def _close(self):
+        if self.file is not None:
+            self.file.close()
+        self.file = None
+        self.inode = None
+        self.offset = 0
+        self.partial = b""
+
+    def get_lines(self):
+        with self.condition:
+            if self.error:
+                return list(self.lines) + [self.error]
+            return list(self.lines)
+
+    def get_cursor(self):
+        with self.condition:
+            return f"{self.session}:{self.next_index}"
+
+    def get_lines_since(self, cursor):
+        """Returns (lines, cursor, reset). reset is True if the cursor is unknown and all lines are returned."""
+        with self.condition:
+            try:
+                session, index = (int(part) for part in str(cursor).split(":"))
+            except (TypeError, ValueError):
+                session, index = None, None
+
+            if session != self.session or index is None or not self.first_index <= index <= self.next_index:
+                return list(self.lines), f"{self.session}:{self.next_index}", True
+
+            lines = [self.lines[i - self.first_index] for i in range(index, self.next_index)]
+            return lines, f"{self.session}:{self.next_index}", False
+
+
 class LogReader:
     def __init__(self):
         self.config = Config()
         self.log_file_path = self.config.log_file_path
+        self.tail = LogTail.get_instance(self.log_file_path)
         self.lines = []
         self.read_log_file()
 
     def read_log_file(self):
-        try:
-            with open(self.log_file_path, 'r', encoding='utf-8') as log_file:
-                lines = log_file.readlines()
-
-                # Suche von hinten nach der Zeile, die mit "started..." endet
-                started_line_index = None
-                for i in range(len(lines) - 1, -1, -1):
-                    if lines[i].strip().endswith("started..."):
-                        started_line_index = i
-                        break
-
-                if started_line_index is not None:
-                    # Lese alle Zeilen ab der gefundenen Zeile bis zum Ende der Datei
-                    last_lines = lines[started_line_index:]
-                else:
-                    # Wenn die Zeile nicht gefunden wurde, lese die gesamte Datei
-                    last_lines = lines
-
-                # Füge die gelesenen Zeilen in die Liste ein
-                self.lines.extend(last_lines)
-        except FileNotFoundError:
-            self.lines.extend(["Log file not found."])
-        except Exception as e:
-            self.lines.extend([f"Error reading log file: {e}"])
+        # Nur die seit dem letzten Aufruf angehängten Bytes lesen
+        self.tail.poll()
+        self.lines = self.tail.get_lines()
 
     def get_last_lines(self):
         return self.lines
 
     def get_log_data_for_frontend(self, show_debug=True):
         # Hole die letzten Zeilen aus der Liste
-        last_lines = self.get_last_lines()
-
+        return self.format_lines_for_frontend(self.get_last_lines(), show_debug)
+
+    def get_log_delta_for_frontend(self, cursor, show_debug=True):
+        """Only the lines appended since ``cursor``, for the incremental update of the log view."""
+        self.tail.poll()
+        lines, cursor, reset = self.tail.get_lines_since(cursor)
+        return {
+            'cursor': cursor,
+            'reset': reset,
+            'html': self.format_lines_for_frontend(lines, show_debug)
+        }
+
+    @staticmethod
+    def format_lines_for_frontend(lines, show_debug=True):
         # Wandele die Zeilen in HTML-Format um
         html_formatted_lines = []
-        for line in last_lines:
+        for line in lines:
             if not show_debug and line.startswith("[D"):
                 continue
-            colored_line = self.colorize_log_level(line)
+            colored_line = LogReader.colorize_log_level(line)
             if len(colored_line) == 0:
                 continue
             html_formatted_lines.append(colored_line)
@@ -55,7 +182,8 @@ class LogReader:
         # Gib das HTML-formatierte Ergebnis zurück
         return '<br>'.join(html_formatted_lines)
 
-    def colorize_log_level(self, line):
+    @staticmethod
+    def colorize_log_level(line):
         # Finden Sie das erste '[' und ']'
         start_index = line.find('[')
         end_index = line.find(']')
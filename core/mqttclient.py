@@ -28,6 +28,7 @@
 import time
 import re
 import json
+import threading
 import paho.mqtt.client as mqtt
 from datetime import datetime
 from core.log import CustomLogger
@@ -52,41 +53,67 @@ class MqttResult:
 from core.statsmanager import StatsManager
 
 
-class PvInverterResults(MqttResult):
+class DeviceTopicParser:
+    """Splits N/<unit_id>/<service>/<device_id>/<path> topics, the pattern is compiled once per service."""
+    patterns = {}
+
+    def __init__(self, service):
+        if service not in DeviceTopicParser.patterns:
+            DeviceTopicParser.patterns[service] = re.compile(rf'N/[^/]+/{re.escape(service)}/(\d+)/(.+)')
+        self.pattern = DeviceTopicParser.patterns[service]
+
+    def parse(self, topic):
+        match = self.pattern.match(topic)
+        if match is None:
+            return None, None
+        return int(match.group(1)), match.group(2)
+
+    @staticmethod
+    def decode(payload):
+        if not isinstance(payload, (str, bytes, bytearray)):
+            return payload
+        try:
+            return json.loads(payload).get('value')
+        except (ValueError, AttributeError):
+            return None
+
+
+class DeviceResults(MqttResult):
+    service = None
+
     def __init__(self):
         super().__init__()
-        self.results = {}
-        self.inverters = {}
-        # self.status = StatsManager()
+        self.parser = DeviceTopicParser(self.service)
+        self.devices = {}
 
     def add_value(self, topic, value):
         self.results[topic] = value
-        self.add_pvinverter(topic, value)
+        self.set_value(topic, DeviceTopicParser.decode(value))
 
-    def add_pvinverter(self, topic, value):
-        pattern = r'N/[^/]+/pvinverter/(\d+)/([^/]+)'
+    def set_value(self, topic, value):
+        """Stores an already decoded value, e.g. from MqttTopicCache.get_values."""
+        device_id, path = self.parser.parse(topic)
+        if device_id is None:
+            return None, None
 
-        # Verwenden Sie re.match, um den regulären Ausdruck auf die Zeichenkette anzuwenden
-        match = re.match(pattern, topic)
+        self.devices.setdefault(device_id, {})[path] = value
+        return device_id, path
 
-        if match:
-            device_id = int(match.group(1))  # Sie können den Wert als Integer konvertieren, wenn erforderlich
-            keyword = match.group(2)
 
-            if device_id not in self.inverters:
-                self.inverters[device_id] = {}
+class PvInverterResults(DeviceResults):
+    service = 'pvinverter'
 
-            index = topic.find(keyword)
+    def __init__(self):
+        super().__init__()
+        self.inverters = self.devices
+        # self.status = StatsManager()
 
-            if index != -1:
-                result = topic[index:]
-                if result == 'ProductName':
-                    if result.lower() == "opentpu" or result.lower == "ahoi":
-                        self.inverters[device_id]['PI'] = '{"value": 1000}'
-                    else:
-                        self.inverters[device_id]['PI'] = '{"value": 1000}'
+    def set_value(self, topic, value):
+        device_id, path = super().set_value(topic, value)
+        if path == 'ProductName':
+            self.inverters[device_id]['PI'] = 1000
 
-                self.inverters[device_id][result] = value
+        return device_id, path
 
     def get_forward_kwh(self, device_id):
         pi = self.get_value(device_id, 'PI')
@@ -101,44 +128,18 @@ class PvInverterResults(MqttResult):
         return float(forward * pi)
 
     def get_value(self, device_id, key, default=0.0):
-        if device_id in self.inverters and key in self.inverters[device_id]:
-            value_str = self.inverters[device_id][key]
-            value = json.loads(value_str)['value']
-            return value if value is not None else default
-        else:
-            return default
+        value = self.inverters.get(device_id, {}).get(key)
+        return value if value is not None else default
+
 
+class GridMetersResults(DeviceResults):
+    service = 'grid'
 
-class GridMetersResults(MqttResult):
     def __init__(self):
         super().__init__()
-        self.results = {}
-        self.gridmeters = {}
+        self.gridmeters = self.devices
         # self.status = StatsManager()
 
-    def add_value(self, topic, value):
-        self.results[topic] = value
-        self.add_gridmeters(topic, value)
-
-    def add_gridmeters(self, topic, value):
-        pattern = r'N/[^/]+/grid/(\d+)/([^/]+)'
-
-        # Verwenden Sie re.match, um den regulären Ausdruck auf die Zeichenkette anzuwenden
-        match = re.match(pattern, topic)
-
-        if match:
-            id = int(match.group(1))  # Sie können den Wert als Integer konvertieren, wenn erforderlich
-            keyword = match.group(2)
-
-            if id not in self.gridmeters:
-                self.gridmeters[id] = {}
-
-            index = topic.find(keyword)
-
-            if index != -1:
-                result = topic[index:]
-                self.gridmeters[id][result] = value
-
     def get_forward_kwh(self, device_id):
         pi = 1000
         forward = self.get_value(device_id, 'Ac/Energy/Forward')
@@ -173,114 +174,21 @@ class GridMetersResults(MqttResult):
         return forward / hours_since_midnight
 
     def get_value(self, device_id, key):
-        if device_id in self.gridmeters and key in self.gridmeters[device_id]:
-            value_str = self.gridmeters[device_id][key]
-            return json.loads(value_str)['value']
-        else:
-            return None
-
-
-class Subscribers(MqttResult):
-    def __init__(self):
-        super().__init__()
-        self.subscribesValues = {}
-        self.subscribesTopics = {}
-        self.logger = CustomLogger()
+        return self.gridmeters.get(device_id, {}).get(key)
 
-    def add_value(self, topic, value):
-        group = self.find_group_by_topic(topic)
-        if not group:
-            return
 
-        if group not in self.subscribesValues:
-            self.subscribesValues[group] = {}
+class MqttSession:
+    """Long-lived broker connection shared by all MqttClient instances with the same configuration."""
 
-        key = topic.split("/")[-1]
-
-        self.subscribesValues[group][key] = {'value': value, 'topic': topic}
-
-    def find_group_by_topic(self, target_topic):
-        for group, topics in self.subscribesValues.items():
-            for key, data in topics.items():
-                if data['topic'] == target_topic:
-                    return group
-        return None
-
-    def remove_topic(self, group, key):
-        """
-        Löscht ein Thema mit allen Werten aus dem Dictionary.
-        """
-        if group in self.subscribesValues and key in self.subscribesValues[group]:
-            del self.subscribesValues[group][key]
-
-    def update_extract_group_topic(self, full_topic):
-        parts = full_topic.split(':')
-        group = parts[0]
-        topic = parts[1]
-        key = topic.split("/")[-1]
-
-        # Entferne vorhandenes Thema mit allen Werten
-        self.remove_topic(group, key)
-
-        # Füge das Thema zu Subscribers hinzu
-        if group not in self.subscribesValues:
-            self.subscribesValues[group] = {}
-
-        self.subscribesValues[group][key] = {'topic': topic}
-
-        return group, topic
-
-    def get(self, group, key):
-        try:
-            if group in self.subscribesValues and key in self.subscribesValues[group]:
-                return self.subscribesValues[group][key]['value']
-        except KeyError:
-            self.logger.log_error(f"KeyError: The key {key} was not found.")
-        return None
-
-    def get_topic(self, full_key):
-        group, key = full_key.split('/')
-        if group in self.subscribesValues and key in self.subscribesValues[group]:
-            return self.subscribesValues[group][key]['topic']
-        return None
-
-    def count_topics(self, data):
-        topic_count = 0
-
-        for key, value in data.items():
-            if isinstance(value, dict):
-                # Rekursiver Aufruf bei verschachtelten Dictionnaries
-                if 'topic' in value:
-                    topic_count += 1
-                # Weiter in die Tiefe des Dictionaries gehen
-                topic_count += self.count_topics(value)
-
-        return topic_count
-
-    def count_values(self, data):
-        values_count = 0
-
-        for key, value in data.items():
-            if isinstance(value, dict):
-                nested_values_count = self.count_values(value)
-                values_count += nested_values_count
-            elif 'value' in value:
-                values_count += 1
-
-        return values_count
-
-
-class MqttClient:
     def __init__(self, mqtt_config):
         self.logger = CustomLogger()
-        self.client = mqtt.Client(client_id=f"seuss-{Utils.generate_random_hex(8)}, protocol={mqtt.MQTTv5}")
-        self.client.on_connect = self.on_connect
-        self.client.on_message = self.on_message
-        self.client.on_publish = self.on_publish
-        self.client.on_log = self.on_log
-        self.client.on_disconnect = self.on_disconnect
-        self.flag_connected = False
-        self.timeout = 15
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.connect_listeners = []
+        self.connect_count = 0  # Wird bei jedem erfolgreichen (Re)Connect erhöht
+        self.subscriptions = {}  # topic -> Anzahl der MqttClient Instanzen, die das Topic abonniert haben
+        self.connected_event = threading.Event()
+        self.loop_started = False
 
         self.mqtt_broker = mqtt_config.get('ip_adresse', "")
         self.mqtt_port = mqtt_config.get('mqtt_port', 1883)
@@ -289,23 +197,24 @@ class MqttClient:
         self.certificate = mqtt_config.get('certificate', None)
         self.unit_id = mqtt_config.get('unit_id', "")
 
-        self.response_topic = None
-        self.response_payload = None
-        self.subscribers_instance = Subscribers()
-
-        if self.mqtt_port == 8883:
-            self.ssl_context = None
-            if self.mqtt_port == 8883:
-                self.ssl_context = self._create_ssl_context()
-
-            if self.ssl_context:
-                self.client.tls_set_context(self.ssl_context)
+        self.client = mqtt.Client(client_id=f"seuss-{Utils.generate_random_hex(8)}, protocol={mqtt.MQTTv5}")
+        self.client.on_connect = self.on_connect
+        self.client.on_message = self.on_message
+        self.client.on_publish = self.on_publish
+        self.client.on_log = self.on_log
+        self.client.on_disconnect = self.on_disconnect
+        # Die Netzwerkschleife verbindet sich nach einem Abbruch selbstständig neu
+        self.client.reconnect_delay_set(min_delay=1, max_delay=60)
 
-    def __enter__(self):
-        return self
+        if self.user:
+            self.logger.log_debug("user: %s, password: %s", self.user, self.password)
+            plain_password = Utils.decode_from_base64(self.password)
+            self.client.username_pw_set(self.user, password=plain_password)
 
-    def __exit__(self, exc_type, exc_value, traceback):
-        self.disconnect()
+        if self.mqtt_port == 8883:
+            ssl_context = self._create_ssl_context()
+            if ssl_context:
+                self.client.tls_set_context(ssl_context)
 
     def _create_ssl_context(self):
         """Create an SSL context for the MQTT connection."""
@@ -321,206 +230,404 @@ class MqttClient:
             self.logger.log_error("SSL support not available.")
         return context
 
+    def connect(self):
+        with self.lock:
+            if self.loop_started:
+                return True
+
+            try:
+                self.logger.log_debug("connect to: %s:%s", self.mqtt_broker, self.mqtt_port)
+                self.client.connect(self.mqtt_broker, self.mqtt_port, 60)
+            except ConnectionRefusedError:
+                self.logger.log_error(
+                    "Error: The connection to the MQTT broker was denied. Check the broker configuration.")
+                return False
+            except Exception as e:
+                self.logger.log_error(f"Error: {e}")
+                return False
+
+            self.client.loop_start()
+            self.loop_started = True
+            return True
+
+    def close(self):
+        with self.lock:
+            if self.loop_started:
+                self.client.disconnect()
+                self.client.loop_stop()
+                self.loop_started = False
+            self.connected_event.clear()
+
+    @property
+    def flag_connected(self):
+        return self.connected_event.is_set()
+
+    def wait_connected(self, timeout):
+        return self.connected_event.wait(timeout)
+
     def on_connect(self, client, userdata, flags, rc):
         if rc == 0:
-            self.logger.log_debug(f"Connected with result code {rc}")
+            self.logger.log_debug("Connected with result code %s", rc)
+            with self.lock:
+                # Nach einem Reconnect gehen die Abonnements verloren
+                for topic in self.subscriptions:
+                    self.client.subscribe(topic)
+                self.connect_count += 1
+                self.connected_event.set()
+
+            for listener in list(self.connect_listeners):
+                listener()
+
             query_message = ""
             query_topic = f"R/{self.unit_id}/system/0/Serial"
             self.client.publish(query_topic, query_message)
-            self.logger.log_debug(f"on_connect query: {query_topic}")
-            self.flag_connected = True
-            self.subscribers_instance.flag_connected = True
+            self.logger.log_debug("on_connect query: %s", query_topic)
         else:
             self.logger.log_error(f"Connection failed with code {rc}")
 
     def on_message(self, client, userdata, msg):
         topic = msg.topic
         payload = msg.payload.decode('utf-8')
-        self.subscribers_instance.received_topics.add(topic)
-        self.logger.log_debug(f"Received message on topic {topic}: {payload}")
-        self.subscribers_instance.add_value(topic, payload)
-        self.response_payload = payload
+        for listener in list(self.listeners):
+            listener(topic, payload)
 
     def on_publish(self, client, userdata, mid):
-        self.logger.log_debug(f"Message published {mid}")
+        self.logger.log_debug("Message published %s", mid)
 
     def on_log(self, client, userdata, level, buf):
         self.logger.log_debug(buf)
 
     def on_disconnect(self, client, userdata, rc):
-        self.logger.log_debug("Client disconnected")
-        self.flag_connected = False
-
-    def subscribe_multiple(self, subscribers_instance, query_topics):
-        self.subscribers_instance = subscribers_instance
-        self.subscribers_instance.flag_connected = False
-
-        try:
-            # MQTT-Broker-Verbindung und Authentifizierung einrichten
-            if self.user:
-                self.logger.log_debug(f"user: {self.user}, password: {self.password}")
-                plain_password = Utils.decode_from_base64(self.password)
-                self.client.username_pw_set(self.user, password=plain_password)
+        self.logger.log_debug("Client disconnected, rc=%s", rc)
+        self.connected_event.clear()
+
+    def add_listener(self, listener):
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def add_connect_listener(self, listener):
+        with self.lock:
+            self.connect_listeners.append(listener)
+
+    def remove_connect_listener(self, listener):
+        with self.lock:
+            if listener in self.connect_listeners:
+                self.connect_listeners.remove(listener)
+
+    def subscribe(self, topic):
+        with self.lock:
+            count = self.subscriptions.get(topic, 0)
+            self.subscriptions[topic] = count + 1
+            if count == 0 and self.flag_connected:
+                self.client.subscribe(topic)
+
+    def unsubscribe(self, topic):
+        with self.lock:
+            count = self.subscriptions.get(topic, 0)
+            if count <= 1:
+                self.subscriptions.pop(topic, None)
+                if count == 1 and self.flag_connected:
+                    self.client.unsubscribe(topic)
+            else:
+                self.subscriptions[topic] = count - 1
+
+    def publish(self, topic, payload):
+        return self.client.publish(topic, payload)
+
+
+class MqttSessionPool:
+    sessions = {}
+    owners = {}  # owner (z.B. Name der ESS Unit) -> Schlüssel der Session, die er zuletzt angefordert hat
+    lock = threading.Lock()
+
+    @staticmethod
+    def get_key(mqtt_config):
+        return (
+            mqtt_config.get('ip_adresse', ""),
+            mqtt_config.get('mqtt_port', 1883),
+            mqtt_config.get('user', ""),
+            mqtt_config.get('password', ""),
+            mqtt_config.get('unit_id', "")
+        )
+
+    @classmethod
+    def get_session(cls, mqtt_config, owner=None):
+        """Shared session for ``mqtt_config``. If ``owner`` previously used a different configuration,
+        that session is closed and removed unless another owner still uses it."""
+        key = cls.get_key(mqtt_config)
+        with cls.lock:
+            if owner is not None:
+                old_key = cls.owners.get(owner)
+                cls.owners[owner] = key
+                if old_key is not None and old_key != key and old_key not in cls.owners.values():
+                    old_session = cls.sessions.pop(old_key, None)
+                    if old_session is not None:
+                        old_session.close()
+
+            session = cls.sessions.get(key)
+            if session is None:
+                session = MqttSession(mqtt_config)
+                cls.sessions[key] = session
+            return session
+
+    @classmethod
+    def close_all(cls):
+        with cls.lock:
+            for session in cls.sessions.values():
+                session.close()
+            cls.sessions.clear()
+            cls.owners.clear()
 
-            if not self.connect():
-                self.logger.log_error("Failed to connect to the MQTT broker.")
-                return 1
 
-            self.client.loop_start()
-
-            # Abonnements für die angegebenen Themen einrichten
-            for query_topic in query_topics:
-                group, actual_topic = subscribers_instance.update_extract_group_topic(query_topic)
-                self.logger.log_debug(f"Subscribing to: {actual_topic}")
-                self.client.subscribe(actual_topic)
-
-            self.client.publish(f"R/{self.unit_id}/keepalive", "")
-
-            start_time = time.time()
-
-            result = 0
-            # Warte auf das Empfangen aller Themen
-            while not all(
-                    'value' in subtopic_data and subtopic_data['value']
-                    for topic, subtopics in subscribers_instance.subscribesValues.items()
-                    for subtopic, subtopic_data in subtopics.items()
-            ):
-                if time.time() - start_time > self.timeout:
-                    # Timeout erreicht, fehlende oder ungültige Werte protokollieren
-                    missing_topics = [
-                        f"{topic}/{subtopic}" for topic, subtopics in subscribers_instance.subscribesValues.items()
-                        for subtopic, subtopic_data in subtopics.items()
-                        if 'value' not in subtopic_data or not subtopic_data['value']
-                    ]
-                    self.logger.log_debug(f"Current subscribesValues: {subscribers_instance.subscribesValues}")
-                    count = len(missing_topics)
-                    self.logger.log_debug(f"Missing or Invalid Topics ({count}): {missing_topics}")
-                    self.logger.log_warning("Timeout during the MQTT subscription process.")
-                    result = 1
-                    break
-
-                time.sleep(1)
-
-        except Exception as e:
-            # Fehlerbehandlung
-            self.logger.log_error(f"Exception during subscription: {str(e)}")
-            result = 1
+class MqttClient:
+    """Publishes over the shared session, values are read from the MqttTopicCache."""
 
-        finally:
-            self.logger.log_debug("Finish subcribe ...")
-            # Ressourcen freigeben
-            self.client.unsubscribe("#")
-            self.client.loop_stop()
-            # self.disconnect()
+    def __init__(self, mqtt_config):
+        self.logger = CustomLogger()
+        self.session = MqttSessionPool.get_session(mqtt_config)
+        self.client = self.session.client
+        self.timeout = 15
 
-        return result
+        self.mqtt_broker = mqtt_config.get('ip_adresse', "")
+        self.mqtt_port = mqtt_config.get('mqtt_port', 1883)
+        self.user = mqtt_config.get('user', "")
+        self.password = mqtt_config.get('password', "")
+        self.certificate = mqtt_config.get('certificate', None)
+        self.unit_id = mqtt_config.get('unit_id', "")
 
-    def subscribe(self, mqtt_result, query_topic):
-        self.subscribers_instance = mqtt_result
-        self.subscribers_instance.flag_connected = False
-        self.logger.log_debug(f"query_topic: {query_topic}")
-        try:
-            if self.user:
-                self.logger.log_debug(f"user: {self.user}, password: {self.password}")
-                plain_password = Utils.decode_from_base64(self.password)
-                self.client.username_pw_set(self.user, password=plain_password)
+    def __enter__(self):
+        return self
 
-            if not self.connect():
-                return 1
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disconnect()
 
-            self.client.loop_start()
+    @property
+    def flag_connected(self):
+        return self.session.flag_connected
 
-            start_time = time.time()
-            while not self.flag_connected:
-                time.sleep(1)
+    def _wait_connected(self, timeout):
+        if not self.connect():
+            return False
 
-                if time.time() - start_time > self.timeout:
-                    self.logger.log_error("Timeout: Connection could not be established.")
-                    raise TimeoutError
+        if not self.session.wait_connected(timeout):
+            self.logger.log_error("Timeout: Connection could not be established.")
+            return False
 
-            self.logger.log_debug(f"subscribe: {query_topic}")
-            self.client.subscribe(f"{query_topic}")
-            self.client.publish(f"R/{self.unit_id}/keepalive", "")
+        return True
 
-            # Warten auf den Payload
-            start_time = time.time()
-            while self.response_payload is None:
-                if time.time() - start_time > self.timeout:
-                    raise TimeoutError
-                time.sleep(1)
+    def publish(self, query_topic, query_message, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        self.logger.log_debug("query_topic: %s %s", query_topic, query_message)
+        try:
+            if not self._wait_connected(timeout):
+                raise TimeoutError
 
-            time.sleep(1)
-            payload = self.response_payload
-            mqtt_result.result = payload
-            self.logger.log_debug(f"result {payload}")
-            result = 0
+            self.logger.log_debug("publish: %s message: %s", query_topic, query_message)
+            result = self.session.publish(query_topic, query_message)
+            self.logger.log_debug("result rc: %s", result.rc)
+            result = result.rc
 
         except TimeoutError:
             self.logger.log_warning("Timeout during the MQTT publish process.")
-            self.logger.log_debug(f"Timeout MQTT Topic: {query_topic}.")
+            self.logger.log_debug("Timeout MQTT Topic: %s.", query_topic)
             result = 1
 
         finally:
-            self.logger.log_debug("Finish subcribe ...")
-            self.client.unsubscribe("#")
-            self.client.loop_stop()
-            # self.disconnect()
+            self.logger.log_debug("Finish publish ...")
 
         return result
 
-    def publish(self, query_topic, query_message):
-        self.logger.log_debug(f"query_topic: {query_topic} {query_message}")
-        try:
-            if self.user:
-                self.logger.log_debug(f"user: {self.user}, password: {self.password}")
-                plain_password = Utils.decode_from_base64(self.password)
-                self.client.username_pw_set(self.user, password=plain_password)
-
-            if not self.connect():
-                return 1
-
-            self.client.loop_start()
-
-            start_time = time.time()
-
-            while not self.flag_connected:
-                time.sleep(1)
-
-                if time.time() - start_time > self.timeout:
-                    self.logger.log_error("Timeout: Connection could not be established.")
-                    raise TimeoutError
+    def connect(self):
+        return self.session.connect()
 
-            self.logger.log_debug(f"publish: {query_topic} message: {query_message}")
-            result = self.client.publish(query_topic, query_message)
-            self.logger.log_debug(f"result rc: {result.rc}")
-            result = result.rc
+    def disconnect(self):
+        """Nothing to release, the shared connection stays open."""
 
-        except TimeoutError:
-            self.logger.log_warning("Timeout during the MQTT publish process.")
-            self.logger.log_debug(f"Timeout MQTT Topic: {query_topic}.")
-            result = 1
 
-        finally:
-            self.logger.log_debug("Finish subcribe ...")
-            self.client.loop_stop()
-            # self.disconnect()
+class MqttTopicCache:
+    """Keeps the latest value of every topic below one persistent wildcard subscription."""
 
-        return result
+    instances = {}
+    owners = {}  # owner -> Schlüssel des Caches, den er zuletzt angefordert hat
+    lock = threading.Lock()
+    keep_alive_interval = 30
+    # Venus OS >= 3.50 verschickt nach dem ersten Keepalive nur noch Änderungen, ältere Versionen ignorieren die Option
+    keep_alive_suppress_republish = '{"keepalive-options": ["suppress-republish"]}'
 
-    def connect(self):
-        try:
-            self.logger.log_debug(f"connect to: {self.mqtt_broker}:{self.mqtt_port}")
-            if self.client.is_connected(): return True
-            self.client.connect(self.mqtt_broker, self.mqtt_port, 60)
-            return True
-        except ConnectionRefusedError:
-            self.logger.log_error(
-                "Error: The connection to the MQTT broker was denied. Check the broker configuration.")
-        except Exception as e:
-            self.logger.log_error(f"Error: {e}")
+    def __init__(self, session, base_topic, keep_alive_topic=None):
+        self.logger = CustomLogger()
+        self.session = session
+        self.subscription = f"{base_topic}/#"
+        self.topic_prefix = f"{base_topic}/"
+        self.keep_alive_topic = keep_alive_topic
+        self.values = {}  # topic -> (payload, value, timestamp)
+        self.service_index = {}  # "N/<unit_id>/<service>/" -> Topics dieses Dienstes
+        self.waiters = []  # Sets der Topics, auf die wait_for noch wartet
+        self.condition = threading.Condition()
+        self.primed_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.wakeup_event = threading.Event()  # Beendet die Wartezeit bei Stop oder Reconnect vorzeitig
+        self.last_keep_alive = 0.0
+        self.thread = None
+
+    @classmethod
+    def get_instance(cls, mqtt_config, base_topic, keep_alive_topic=None, owner=None):
+        """Cache for ``base_topic``. Pass the ESS unit as ``owner``: after its MQTT settings changed,
+        the cache of the old settings is stopped and its session closed."""
+        with cls.lock:
+            key = (MqttSessionPool.get_key(mqtt_config), base_topic)
+            if owner is not None:
+                old_key = cls.owners.get(owner)
+                cls.owners[owner] = key
+                if old_key is not None and old_key != key and old_key not in cls.owners.values():
+                    old_cache = cls.instances.pop(old_key, None)
+                    if old_cache is not None:
+                        old_cache.stop()
+
+            session = MqttSessionPool.get_session(mqtt_config, owner)
+            cache = cls.instances.get(key)
+            if cache is None:
+                cache = MqttTopicCache(session, base_topic, keep_alive_topic)
+                cls.instances[key] = cache
+            return cache
+
+    @classmethod
+    def stop_all(cls):
+        with cls.lock:
+            for cache in cls.instances.values():
+                cache.stop()
+            cls.instances.clear()
+            cls.owners.clear()
+
+    def start(self):
+        if self.thread is None:
+            self.session.add_listener(self.on_message)
+            self.session.add_connect_listener(self.wakeup_event.set)
+            self.session.subscribe(self.subscription)
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+        return self.session.connect()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wakeup_event.set()
+        if self.thread is not None:
+            self.session.unsubscribe(self.subscription)
+            self.session.remove_listener(self.on_message)
+            self.session.remove_connect_listener(self.wakeup_event.set)
+            self.thread = None
+
+    def run(self):
+        keep_alive_generation = None  # connect_count beim letzten vollständigen Keepalive
+        while not self.stop_event.is_set():
+            self.wakeup_event.clear()
+            if not self.session.wait_connected(self.keep_alive_interval):
+                continue
+
+            if self.keep_alive_topic:
+                # Nach jedem (Re)Connect alle Werte anfordern, auch wenn er zwischen zwei Keepalives lag
+                generation = self.session.connect_count
+                payload = self.keep_alive_suppress_republish if generation == keep_alive_generation else ""
+                self.session.publish(self.keep_alive_topic, payload)
+                self.last_keep_alive = time.time()
+                keep_alive_generation = generation
+
+            self.wakeup_event.wait(self.keep_alive_interval)
+
+    def on_message(self, topic, payload):
+        if not topic.startswith(self.topic_prefix):
+            return
 
-        return False
+        if topic.endswith("/full_publish_completed"):
+            self.primed_event.set()
+            return
 
-    def disconnect(self):
-        if self.client:
-            self.client.disconnect()
+        with self.condition:
+            if not payload:
+                # Leerer Payload: das Gerät bzw. der Wert existiert nicht mehr
+                if self.values.pop(topic, None) is not None:
+                    topics = self.service_index.get(self.get_service_prefix(topic))
+                    if topics is not None:
+                        topics.discard(topic)
+                return
+
+            try:
+                value = json.loads(payload).get('value')
+            except (ValueError, AttributeError):
+                value = None
+
+            if topic not in self.values:
+                service_prefix = self.get_service_prefix(topic)
+                if service_prefix is not None:
+                    self.service_index.setdefault(service_prefix, set()).add(topic)
+                for pending in self.waiters:
+                    pending.discard(topic)
+
+            self.values[topic] = (payload, value, time.time())
+            self.condition.notify_all()
+
+    @staticmethod
+    def get_service_prefix(topic):
+        parts = topic.split('/', 3)
+        return f"{parts[0]}/{parts[1]}/{parts[2]}/" if len(parts) == 4 else None
+
+    def wait_for(self, topics, timeout):
+        with self.condition:
+            pending = {topic for topic in topics if topic not in self.values}
+            if not pending:
+                return True
+
+            # on_message streicht eintreffende Topics, die Prüfung ist damit O(1)
+            self.waiters.append(pending)
+            try:
+                return self.condition.wait_for(lambda: not pending, timeout)
+            finally:
+                self.waiters.remove(pending)
+
+    def wait_for_values(self, expected, timeout):
+        """Waits until every topic in ``expected`` reports the expected value."""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: all(self.get_value(topic) == value for topic, value in expected.items()), timeout)
+
+    def wait_primed(self, timeout):
+        """Waits for the end of the full republish that follows the first keepalive."""
+        return self.primed_event.wait(timeout)
+
+    def is_fresh(self):
+        return self.session.flag_connected and time.time() - self.last_keep_alive < 2 * self.keep_alive_interval
+
+    def get_value(self, topic, default=None):
+        entry = self.values.get(topic)
+        return entry[1] if entry is not None else default
+
+    def get_payload(self, topic):
+        entry = self.values.get(topic)
+        return entry[0] if entry is not None else None
+
+    def get_age(self, topic):
+        entry = self.values.get(topic)
+        return time.time() - entry[2] if entry is not None else None
+
+    def get_items(self, prefix):
+        with self.condition:
+            return [(topic, self.values[topic][0]) for topic in self.get_topics(prefix)]
+
+    def get_values(self, prefix):
+        with self.condition:
+            return [(topic, self.values[topic][1]) for topic in self.get_topics(prefix)]
+
+    def get_topics(self, prefix):
+        if self.get_service_prefix(prefix + "x") == prefix:
+            # Ganzer Dienst (z.B. N/<unit_id>/grid/): direkt aus dem Index
+            return list(self.service_index.get(prefix, ()))
+        return [topic for topic in self.values if topic.startswith(prefix)]
+
+    def get_missing_topics(self, topics):
+        return [topic for topic in topics if topic not in self.values]
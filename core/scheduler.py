@@ -0,0 +1,160 @@
+#  -*- coding: utf-8 -*-
+#
+#  MIT License
+#
+#  Copyright (c) 2024-2025 Christian Kvasny chris(at)ckvsoft.at
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+#
+#  Project: [SEUSS -> Smart Ess Unit Spotmarket Switcher
+#
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+
+from core.log import CustomLogger
+
+
+class ScheduledJob:
+    def __init__(self, name, callback, next_run):
+        self.name = name
+        self.callback = callback
+        self.next_run = next_run  # callable(datetime) -> datetime, muss strikt nach dem übergebenen Zeitpunkt liegen
+        self.due = None  # Geplante Wanduhrzeit (nur für Logausgaben und die Berechnung des Folgetermins)
+        self.deadline = None  # Fälligkeit auf der monotonen Uhr
+        self.cancelled = False
+
+
+class Scheduler:
+    """Deadline based job scheduler using a heap of timers on the monotonic clock."""
+
+    def __init__(self):
+        self.logger = CustomLogger()
+        self._heap = []
+        self._jobs = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+
+    def add_job(self, name, callback, next_run, run_now=False):
+        """Registers a job; ``next_run(now)`` returns the next wall clock time the job is due."""
+        with self._lock:
+            if name in self._jobs:
+                self._jobs[name].cancelled = True
+
+            job = ScheduledJob(name, callback, next_run)
+            self._jobs[name] = job
+            self._push(job, datetime.now() if run_now else job.next_run(datetime.now()))
+
+        self._wakeup.set()
+        return job
+
+    def remove_job(self, name):
+        with self._lock:
+            job = self._jobs.pop(name, None)
+            if job:
+                job.cancelled = True
+
+        self._wakeup.set()
+
+    def reschedule(self, name, run_now=False):
+        """Recalculates the due time of a job, e.g. after a configuration change."""
+        with self._lock:
+            job = self._jobs.get(name)
+            if job is None:
+                return
+
+            job.cancelled = True
+            new_job = ScheduledJob(job.name, job.callback, job.next_run)
+            self._jobs[name] = new_job
+            self._push(new_job, datetime.now() if run_now else new_job.next_run(datetime.now()))
+
+        self._wakeup.set()
+
+    def get_next_run(self, name):
+        job = self._jobs.get(name)
+        return job.due if job else None
+
+    def time_until_next(self):
+        """Seconds until the next job is due, None if no jobs are registered."""
+        with self._lock:
+            self._discard_cancelled()
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def run_pending(self):
+        """Runs every job that is due. Overdue jobs run exactly once (catch-up) and are rescheduled from now."""
+        executed = 0
+        while True:
+            with self._lock:
+                self._discard_cancelled()
+                if not self._heap or self._heap[0][0] > time.monotonic():
+                    return executed
+                _, _, job = heapq.heappop(self._heap)
+
+            delay = (datetime.now() - job.due).total_seconds()
+            if delay > 1:
+                self.logger.log_debug(f"Job {job.name} is {delay:.1f} seconds late, catching up.")
+
+            try:
+                job.callback()
+            except Exception as e:
+                self.logger.log_error(f"Error while running job {job.name}: {e}")
+
+            executed += 1
+            with self._lock:
+                if not job.cancelled:
+                    # Folgetermin von der geplanten Zeit aus berechnen, damit ein leicht verfrühter Lauf
+                    # nicht denselben Termin ein zweites Mal einplant
+                    reference = max(datetime.now(), job.due)
+                    self._push(job, job.next_run(reference))
+
+    def wait(self):
+        """Sleeps until the next job is due, a job was (re)registered or the scheduler was stopped."""
+        self._wakeup.clear()
+        if self._stopped:
+            return
+        timeout = self.time_until_next()
+        if timeout is None or timeout > 0:
+            self._wakeup.wait(timeout)
+
+    def run(self):
+        while not self._stopped:
+            self.run_pending()
+            if self._stopped:
+                break
+            self.wait()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+    def _push(self, job, due):
+        job.due = due
+        job.deadline = time.monotonic() + max(0.0, (due - datetime.now()).total_seconds())
+        heapq.heappush(self._heap, (job.deadline, next(self._sequence), job))
+
+    def _discard_cancelled(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
@@ -32,7 +32,6 @@ import sys
 import threading
 import time
 import random
-import json
 from datetime import datetime, timedelta
 
 import core.version as version
@@ -47,6 +46,8 @@ from core.log import CustomLogger
 from design_patterns.factory.generic_loader_factory import GenericLoaderFactory
 from spotmarket.abstract_classes.itemlist import Itemlist
 from core.seussweb import SEUSSWeb
+from core.scheduler import Scheduler
+from core.mqttclient import MqttSessionPool, MqttTopicCache
 from core.timeutilities import TimeUtilities
 from powerconsumption.powerconsumptionmanager import PowerConsumptionManager
 
@@ -61,7 +62,10 @@ class SEUSS:
 
         self.no_data = [0]
         self.svs_thread_stop_flag = threading.Event()
+        self.scheduler = Scheduler()
+        self.last_essunit_slot = None
         self.solardata = Solardata()
+        self.seuss_web.set_solardata(self.solardata)
         self.items = self.initialize_items()
         self.current_time = datetime.now()
 
@@ -76,6 +80,7 @@ class SEUSS:
         self.run_essunit()
 
     def run_essunit(self):
+        self.last_essunit_slot = self.get_quarter_slot(datetime.now())
         essunit = self.initialize_essunit()
         if essunit is not None:
             unit_config = essunit.get_config()
@@ -89,6 +94,7 @@ class SEUSS:
             #    essunit.get_data()
             total_solar = self.process_solar_data(essunit)
             self.process_solar_forecast(total_solar)
+            self.publish_essunit_state()
             if self.items.get_item_count() > 0:
                 self.evaluate_conditions_and_control_charging_discharging(essunit)
             else:
@@ -111,43 +117,81 @@ class SEUSS:
         self.initialize_logging()
         self.config.observer.add_observer("seuss", self)
 
-        try:
-            while True:
-                self.current_time = datetime.now()
-
-                if self.current_time.minute == 0 and self.current_time.second == 5 or self.items.get_item_count() == 0:
-                    self.run_markets()
-                    if self.items:
-                        next_hour = self.current_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-                        self.logger.log_info(f"Next price check at {next_hour.strftime('%H:%M')}")
-                        self.logger.log_info(
-                            f"Current Spotmarket: {self.items.current_market_name}, failback: {self.items.failback_market_name}")
-
-                interval_minutes = 15
-                if self.current_time.minute % interval_minutes == 0 and self.current_time.minute != 0 and (
-                        self.current_time.second == 0):
-                    if (
-                            self.items.get_item_count() < 25
-                            if self.config.use_second_day and 13 < self.current_time.hour < 15
-                            else False
-                    ):
-                        self.run_markets()
-                    else:
-                        self.run_essunit()
-                    if self.items:
-                        next_hour = self.current_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-                        self.logger.log_info(f"Next price check at {next_hour.strftime('%H:%M')}")
-                        self.logger.log_info(
-                            f"Current Spotmarket: {self.items.current_market_name}, failback: {self.items.failback_market_name}")
+        self.scheduler.add_job("markets", self.run_markets_job, self.get_next_markets_run, run_now=True)
+        self.scheduler.add_job("second_day", self.run_second_day_job, self.get_next_second_day_run)
+        self.scheduler.add_job("essunit", self.run_essunit_job, self.get_next_essunit_run)
 
+        try:
+            while not self.svs_thread_stop_flag.is_set():
+                self.scheduler.run_pending()
                 self.perform_test_run()
-                self.handle_no_data_sleep()
-                # self.handle_time_to_next_hour(current_time)
-                time.sleep(1)
+                # Schläft bis zum nächsten fälligen Job
+                self.scheduler.wait()
 
         except KeyboardInterrupt:
             self.graceful_exit(signal.SIGINT, None)
 
+    def run_markets_job(self):
+        self.current_time = datetime.now()
+        self.run_markets()
+        self.log_next_price_check()
+
+    def run_second_day_job(self):
+        if not self.is_second_day_retry_pending():
+            return
+
+        self.current_time = datetime.now()
+        self.run_markets()
+        self.log_next_price_check()
+
+    def run_essunit_job(self):
+        self.current_time = datetime.now()
+        # Bereits durch run_markets in diesem Intervall erledigt oder vom second_day Job übernommen
+        if self.last_essunit_slot == self.get_quarter_slot(self.current_time) or self.is_second_day_retry_pending():
+            return
+
+        self.run_essunit()
+        self.log_next_price_check()
+
+    def is_second_day_retry_pending(self):
+        return (self.config.use_second_day and 13 < datetime.now().hour < 15
+                and self.items.get_item_count() < 25)
+
+    def log_next_price_check(self):
+        if self.items:
+            next_run = self.scheduler.get_next_run("markets")
+            if next_run is None or next_run <= self.current_time:
+                next_run = self.current_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            self.logger.log_info(f"Next price check at {next_run.strftime('%H:%M')}")
+            self.logger.log_info(
+                f"Current Spotmarket: {self.items.current_market_name}, failback: {self.items.failback_market_name}")
+
+    @staticmethod
+    def get_quarter_slot(current_time):
+        return current_time.replace(minute=(current_time.minute // 15) * 15, second=0, microsecond=0)
+
+    def get_next_markets_run(self, now):
+        if self.items.get_item_count() == 0:
+            return now + timedelta(seconds=self.get_no_data_retry_delay())
+
+        next_run = now.replace(minute=0, second=5, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(hours=1)
+        return next_run
+
+    def get_next_essunit_run(self, now):
+        # Zur vollen Stunde prüft bereits der markets Job
+        next_run = self.get_quarter_slot(now) + timedelta(minutes=15)
+        if next_run.minute == 0:
+            next_run += timedelta(minutes=15)
+        return next_run
+
+    def get_next_second_day_run(self, now):
+        next_run = self.get_next_essunit_run(now)
+        while not 13 < next_run.hour < 15:
+            next_run = self.get_next_essunit_run(next_run)
+        return next_run
+
     def load_configuration(self):
         self.config.load_config()
 
@@ -191,12 +235,13 @@ class SEUSS:
             productname = gridmeters.get_value(key_outer, 'ProductName')
             forward = gridmeters.get_forward_kwh(key_outer)
             forward_hourly = gridmeters.get_hourly_kwh(key_outer)
-            self.logger.log_debug(f"Found Gridmeter:  {productname} {customname}.")
+            self.logger.log_debug("Found Gridmeter:  %s %s.", productname, customname)
             self.logger.log_info(
                 f"{productname} {customname} today:  {round(forward, 2)} Wh, average hour: {round(forward_hourly, 2)} Wh")
 
-            for key_inner, value_inner in value_outer.items():
-                self.logger.log_debug(f"  {key_inner}: {json.loads(value_inner)['value']}")
+            if self.logger.is_debug_enabled():
+                for key_inner, value_inner in value_outer.items():
+                    self.logger.log_debug("  %s: %s", key_inner, value_inner)
 
         statsmanager = StatsManager()
         total_forward_hourly_list = statsmanager.get_data("powerconsumption","hourly_watt_average")
@@ -216,11 +261,12 @@ class SEUSS:
             productname = inverters.get_value(key_outer, 'ProductName')
             forward = inverters.get_forward_kwh(key_outer)
             total_solar += float(forward)
-            self.logger.log_debug(f"Found PV Inverter:  {productname} {customname}.")
+            self.logger.log_debug("Found PV Inverter:  %s %s.", productname, customname)
             self.logger.log_info(f"{productname} {customname} yield today:  {round(forward, 2)} Wh.")
 
-            for key_inner, value_inner in value_outer.items():
-                self.logger.log_debug(f"  {key_inner}: {json.loads(value_inner)['value']}")
+            if self.logger.is_debug_enabled():
+                for key_inner, value_inner in value_outer.items():
+                    self.logger.log_debug("  %s: %s", key_inner, value_inner)
 
         self.logger.log_info(f"All Inverters yield today:  {round(total_solar, 2)} Wh.")
         self.solardata.update_current_hour_solar_yield(round(total_solar, 2))
@@ -267,10 +313,34 @@ class SEUSS:
 
             self.control_charging(essunit, condition_charging_result)
             self.control_discharging(essunit, condition_discharging_result)
+            self.publish_ws('decision', {
+                'charging': bool(condition_charging_result.execute),
+                'charging_condition': str(condition_charging_result.condition),
+                'discharging': bool(condition_discharging_result.execute),
+                'discharging_condition': str(condition_discharging_result.condition)
+            })
 
         self.items.log_items()
         self.no_data[0] = 0
 
+    def publish_ws(self, channel, fields):
+        if self.ws_server:
+            self.ws_server.publish(channel, fields)
+
+    def publish_essunit_state(self):
+        self.publish_ws('soc', {
+            'soc': self.solardata.soc,
+            'need_soc': self.solardata.need_soc,
+            'battery_capacity': self.solardata.battery_capacity,
+            'solar_yield': self.solardata.current_hour_solar_yield
+        })
+
+        item = self.items.get_current_item() if self.items.get_item_count() > 0 else None
+        if item is not None:
+            price_slot = SEUSSWeb.get_price_entries([item])[0]
+            price_slot['market'] = self.items.current_market_name
+            self.publish_ws('price', price_slot)
+
     def control_charging(self, essunit, condition_charging_result):
         if condition_charging_result.execute and essunit is not None:
             self.logger.log_info(
@@ -312,15 +382,16 @@ class SEUSS:
         if test_run is not None:
             self.graceful_exit(signal.SIGINT, None)
 
-    def handle_no_data_sleep(self):
+    def get_no_data_retry_delay(self):
+        sleeptime = random.randint(10, 60)
         if 0 < self.no_data[0] < 4:
-            sleeptime = random.randint(10, 60)
             self.logger.log_info(
                 f"There is no data available, attempt number {self.no_data[0]}/3 failed. wait {sleeptime} seconds for the next attempt.")
-            time.sleep(sleeptime)
         else:
             self.no_data[0] = 0  # Aktualisiere die verpackte Variable
 
+        return sleeptime
+
     def handle_time_to_next_hour(self, current_time):
         next_hour = (current_time + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
         time_to_next_hour = int((next_hour - current_time).total_seconds())
@@ -335,7 +406,10 @@ class SEUSS:
         self.logger.log_info("Program will be terminated...")
         self.seuss_web.stop()
         self.power_consumption_manager.stop_instance()
+        MqttTopicCache.stop_all()
+        MqttSessionPool.close_all()
         self.svs_thread_stop_flag.set()
+        self.scheduler.stop()
 
         sys.exit(0)
 
@@ -32,8 +32,11 @@ import websockets
 from core.utils import Utils
 from bottle import template, static_file, response, request, redirect
 import bottle
+import copy
+import hashlib
 import json
-import os, sys, glob
+import io
+import os, sys
 import zipfile
 import threading
 import core.version as version
@@ -42,8 +45,31 @@ from waitress import serve
 from core.config import Config
 from core.logreader import LogReader
 from core.log import CustomLogger
+from core.statsmanager import StatsManager
+from core.timeutilities import TimeUtilities
+from spotmarket.abstract_classes.item import Item
 from spotmarket.abstract_classes.itemlist import Itemlist
 
+class StreamBuffer(io.RawIOBase):
+    """Unseekable write target for zipfile, the written bytes are handed out chunk by chunk."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
 class SEUSSWeb:
     def __init__(self):
         # Erstelle die Bottle-App und integriere Socket.IO
@@ -56,6 +82,9 @@ class SEUSSWeb:
         self.config = Config()
         self.logger = CustomLogger()
         self.market_items = Itemlist()
+        self.index_cache = None  # (cache_key, gerenderte Indexseite)
+        self.api_cache = {}  # Endpunkt -> (cache_key, body, etag)
+        self.solardata = None
 
         # Routen einrichten
         self.setup_routes()
@@ -84,6 +113,11 @@ class SEUSSWeb:
         self.app.route('/update_log', method='GET', callback=self.update_log)
         self.app.route('/check_is_online', method='GET', callback=self.check_is_online)
         self.app.route('/add_config_entry', method='POST', callback=self.add_config_entry)
+        self.app.route('/api/prices', method='GET', callback=self.api_prices)
+        self.app.route('/api/plan', method='GET', callback=self.api_plan)
+        self.app.route('/api/forecast', method='GET', callback=self.api_forecast)
+        self.app.route('/api/solardata', method='GET', callback=self.api_solardata)
+        self.app.route('/api/stats', method='GET', callback=self.api_stats)
 
     def add_config_entry(self):
         param_name = request.json.get('param_name')
@@ -110,7 +144,113 @@ class SEUSSWeb:
     def set_item_list(self, items):
         self.market_items = items
 
+    def set_solardata(self, solardata):
+        self.solardata = solardata
+
+    def api_prices(self):
+        # Die Aufteilung in heute/morgen ändert sich auch ohne neue Preise um Mitternacht
+        cache_key = (self.market_items.version, datetime.now().date())
+        return self.cached_json_response('prices', cache_key, self.get_prices_data)
+
+    def api_plan(self):
+        return self.cached_json_response('plan', self.get_index_cache_key(), self.get_plan_data)
+
+    def api_forecast(self):
+        solardata = self.solardata
+        if solardata is None:
+            return self.json_response({})
+
+        return self.json_response({key: getattr(solardata, key) for key in (
+            'sunrise_current_day', 'sunset_current_day', 'sunrise_tomorrow_day', 'sunset_tomorrow_day',
+            'sun_time_today_minutes', 'sun_time_tomorrow_minutes', 'total_current_hour', 'total_current_day',
+            'total_tomorrow_day', 'current_hour_forcast', 'current_hour_solar_yield', 'power_peak')})
+
+    def api_solardata(self):
+        return self.json_response(vars(self.solardata) if self.solardata is not None else {})
+
+    def api_stats(self):
+        # Kopie unter dem Lock serialisieren, die Daten werden von anderen Threads verändert
+        with StatsManager.lock:
+            data = copy.deepcopy(StatsManager.data)
+            power_events = {event_type: list(events) for event_type, events in StatsManager.power_events.items()}
+
+        return self.json_response({
+            'data': data,
+            'power_events': power_events,
+            'total_download_time': StatsManager.get_total_download_time()
+        })
+
+    def get_prices_data(self):
+        average_price_today, average_price_tomorow = self.market_items.get_average_price_by_date(True)
+        return {
+            'version': self.market_items.version,
+            'market': self.market_items.current_market_name,
+            'average_today': average_price_today,
+            'average_tomorrow': average_price_tomorow,
+            'prices': self.get_price_entries(self.market_items.get_current_list())
+        }
+
+    def get_plan_data(self):
+        return {
+            'version': self.market_items.version,
+            'charging_price_limit': self.config.charging_price_limit,
+            'charging_price_hard_cap': self.config.charging_price_hard_cap,
+            'charging': self.get_price_entries(
+                self.market_items.get_lowest_prices(self.config.number_of_lowest_prices_for_charging)),
+            'discharging': self.get_price_entries(
+                self.market_items.get_highest_prices(self.config.number_of_highest_prices_for_discharging))
+        }
+
+    @staticmethod
+    def get_price_entries(items):
+        entries = []
+        for item in items:
+            start = item.get_start_epoch()
+            end = item.get_end_epoch()
+            entries.append({
+                'start': datetime.fromtimestamp(start, TimeUtilities.TZ).isoformat(),
+                'end': datetime.fromtimestamp(end + 1, TimeUtilities.TZ).isoformat() if end is not None else None,
+                'price': Item.to_cent(item.get_price(False))
+            })
+        return entries
+
+    def cached_json_response(self, name, cache_key, build):
+        # Serialisierung und ETag nur neu berechnen, wenn sich die Daten geändert haben
+        cached = self.api_cache.get(name)
+        if cached is None or cached[0] != cache_key:
+            body, etag = self.serialize_json(build())
+            cached = (cache_key, body, etag)
+            self.api_cache[name] = cached
+        return self.etag_response(cached[1], cached[2])
+
+    def json_response(self, data):
+        body, etag = self.serialize_json(data)
+        return self.etag_response(body, etag)
+
+    @staticmethod
+    def serialize_json(data):
+        body = json.dumps(data, separators=(',', ':'), default=str)
+        return body, '"' + hashlib.sha1(body.encode('utf-8')).hexdigest() + '"'
+
+    @staticmethod
+    def etag_response(body, etag):
+        response.set_header('ETag', etag)
+        response.set_header('Cache-Control', 'no-cache')
+        response.content_type = 'application/json'
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or
+                              etag in (tag.strip() for tag in if_none_match.split(','))):
+            response.status = 304
+            return ''
+        return body
+
     def index(self):
+        # Die Seite ändert sich nur mit der Preisliste, den Schwellwerten oder der aktuellen Stunde
+        cache_key = self.get_index_cache_key()
+        cached = self.index_cache
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
 
         data, gray_hours, next_data, next_gray_hours = Itemlist.get_price_hour_lists(
             self.market_items.get_current_list())
@@ -119,13 +259,25 @@ class SEUSSWeb:
         red_data, red_hours, next_red_data, next_red_hours = Itemlist.get_price_hour_lists(
             self.market_items.get_highest_prices(self.config.number_of_highest_prices_for_discharging))
 
-        chart_svg = self.generate_chart_svg(data, green_hours, red_hours)
-        next_chart_svg = self.generate_chart_svg(next_data, next_green_hours, next_red_hours, True)
+        average_prices = self.market_items.get_average_price_by_date(True)
+        chart_svg = self.generate_chart_svg(data, green_hours, red_hours, average_prices=average_prices)
+        next_chart_svg = self.generate_chart_svg(next_data, next_green_hours, next_red_hours, True, average_prices)
 
-        legend_svg = self.generate_legend_svg()
+        legend_svg = self.generate_legend_svg(average_prices)
 
-        return template('index', chart_svg=chart_svg, legend_svg=legend_svg, next_chart_svg=next_chart_svg,
+        page = template('index', chart_svg=chart_svg, legend_svg=legend_svg, next_chart_svg=next_chart_svg,
                         version=version.__version__, root=self.view_path)
+        self.index_cache = (cache_key, page)
+        return page
+
+    def get_index_cache_key(self):
+        now = datetime.now()
+        return (self.market_items.version,
+                self.config.number_of_lowest_prices_for_charging,
+                self.config.number_of_highest_prices_for_discharging,
+                self.config.charging_price_limit,
+                self.config.charging_price_hard_cap,
+                now.date(), now.hour)
 
     def logview(self):
         reader = LogReader()
@@ -141,6 +293,11 @@ class SEUSSWeb:
         reader = LogReader()
 
         hide_debug = False if request.query.get("hide_debug") == 'true' else True  # her we need the reverse
+        cursor = request.query.get("cursor")
+        if cursor is not None:
+            # Nur die neuen Zeilen seit dem letzten Abruf liefern
+            return reader.get_log_delta_for_frontend(cursor, hide_debug)
+
         log_content = reader.get_log_data_for_frontend(hide_debug)
 
         return log_content
@@ -155,32 +312,84 @@ class SEUSSWeb:
 
         file_name = os.path.basename(self.config.log_file_path)
 
-        zip_files = glob.glob(os.path.join(directory_path, '*.zip'))
-
-        for zip_file in zip_files:
-            try:
-                os.remove(zip_file)
-            except Exception as e:
-                pass
-
-        # Dateien im Verzeichnis auflisten
+        # Dateien im Verzeichnis auflisten, älteste Rotation zuerst
         files = os.listdir(str(directory_path))
-        logfiles = [file for file in files if file.startswith(file_name)]
+        logfiles = sorted((file for file in files if file.startswith(file_name) and not file.endswith('.zip')),
+                          key=lambda file: os.path.getmtime(os.path.join(directory_path, file)))
 
-        # Pfad zum temporären ZIP-Archiv
-        zip_file_name = 'logfiles_' + str(int(datetime.now().timestamp() / 1000)) + '.zip'
-        zip_file_path = os.path.join(directory_path, zip_file_name)
+        # Optionaler Zeitraum im Format YYYY-MM-DD
+        try:
+            date_from = self._parse_log_date(request.params.get('date_from'))
+            date_to = self._parse_log_date(request.params.get('date_to'))
+        except ValueError:
+            response.status = 400
+            return "Invalid date, expected YYYY-MM-DD."
 
-        # ZIP-Archiv erstellen und Dateien hinzufügen
-        with zipfile.ZipFile(zip_file_path, 'w') as zip_file:
-            for file in logfiles:
-                file_path = os.path.join(directory_path, file)
-                zip_file.write(file_path, file)
+        zip_file_name = 'logfiles_' + datetime.now().strftime('%Y%m%d_%H%M%S') + '.zip'
 
-        # ZIP-Archiv zum Download anbieten
+        # ZIP-Archiv direkt in die Antwort streamen, ohne temporäre Datei
         response.headers['Content-Type'] = 'application/zip'
-        response.headers['Content-Disposition'] = f'attachment; {zip_file_name}'
-        return static_file(zip_file_name, root=directory_path, download=True)
+        response.headers['Content-Disposition'] = f'attachment; filename="{zip_file_name}"'
+        return self._stream_log_archive(directory_path, logfiles, date_from, date_to)
+
+    @staticmethod
+    def _parse_log_date(value):
+        if not value:
+            return None
+        return datetime.strptime(value, '%Y-%m-%d').date()
+
+    def _stream_log_archive(self, directory_path, logfiles, date_from=None, date_to=None):
+        buffer = StreamBuffer()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for file in logfiles:
+                file_path = os.path.join(directory_path, file)
+                try:
+                    if date_from and datetime.fromtimestamp(os.path.getmtime(file_path)).date() < date_from:
+                        continue  # Datei wurde zuletzt vor dem Zeitraum geschrieben
+
+                    with open(file_path, 'rb') as source:
+                        chunks = self._read_log_chunks(source, date_from, date_to)
+                        # Dateien ohne Zeilen im Zeitraum bekommen keinen leeren Eintrag im Archiv
+                        first_chunk = next(chunks, None)
+                        if first_chunk is None:
+                            continue
+
+                        zip_info = zipfile.ZipInfo.from_file(file_path, file)
+                        zip_info.compress_type = zipfile.ZIP_DEFLATED
+                        with zip_file.open(zip_info, 'w', force_zip64=True) as target:
+                            target.write(first_chunk)
+                            yield buffer.pop()
+                            for chunk in chunks:
+                                target.write(chunk)
+                                yield buffer.pop()
+                except OSError as e:
+                    self.logger.log_error(f"Error adding {file} to log archive: {e}")
+
+        yield buffer.pop()
+
+    @staticmethod
+    def _read_log_chunks(source, date_from=None, date_to=None, chunk_size=64 * 1024):
+        if date_from is None and date_to is None:
+            while chunk := source.read(chunk_size):
+                yield chunk
+            return
+
+        # Zeilen wie "[I 241231 12:00:00 ...]" nach Datum filtern, Folgezeilen gehören zur vorherigen Zeile
+        first = date_from.strftime('%y%m%d') if date_from else None
+        last = date_to.strftime('%y%m%d') if date_to else None
+        keep = True
+        lines = []
+        for line in source:
+            if line.startswith(b'[') and line[2:3] == b' ' and line[3:9].isdigit():
+                day = line[3:9].decode()
+                keep = (first is None or day >= first) and (last is None or day <= last)
+            if keep:
+                lines.append(line)
+                if len(lines) >= 1000:
+                    yield b''.join(lines)
+                    lines = []
+        if lines:
+            yield b''.join(lines)
 
     def editor(self):
         tooltips = {}
@@ -279,22 +488,26 @@ class SEUSSWeb:
         # Zurück zur Indexseite
         return new_config
 
-    def generate_chart_svg(self, data, green_hours, red_hours, tomorrow=False):
+    def generate_chart_svg(self, data, green_hours, red_hours, tomorrow=False, average_prices=None):
         # SVG-Code für das Balkendiagramm
         current_time = datetime.now()
         current_hour = current_time.hour
         width = 35
         factor = 12
+        charging_price_limit = self.config.charging_price_limit
+        charging_price_hard_cap = self.config.charging_price_hard_cap
 
         # Wenn keine Preise vorhanden sind, initialisiere mit 24 Preisen von 0.00
         if not data:
             data = {hour: None for hour in range(24)}
 
-        svg = f"""
+        svg = [f"""
         <svg width="{width * 24}" height="420" xmlns="http://www.w3.org/2000/svg" style="border: 1px solid #ccc; margin: 25px;">
-        """
+        """]
 
-        average_price_today, average_price_tomorow = self.market_items.get_average_price_by_date(True)
+        if average_prices is None:
+            average_prices = self.market_items.get_average_price_by_date(True)
+        average_price_today, average_price_tomorow = average_prices
         avg_height = 12
         if tomorrow and average_price_tomorow is not None:
             avg_height = (average_price_tomorow + 1) * factor  # Umrechnung in Höhe (Skalierung)
@@ -302,35 +515,34 @@ class SEUSSWeb:
             avg_height = (average_price_today + 1) * factor  # Umrechnung in Höhe (Skalierung)
 
         y_avg_line = 330 - avg_height  # Linie für den Durchschnittspreis
-        svg += f"""
+        svg.append(f"""
         <line x1="0" y1="{y_avg_line}" x2="{width * 24}" y2="{y_avg_line}" stroke="magenta" stroke-width="2"/>
-        """
+        """)
 
-        charge_limit_height = (abs(self.config.charging_price_limit) + 1) * factor
-        svg += f"""
+        charge_limit_height = (abs(charging_price_limit) + 1) * factor
+        svg.append(f"""
         <line x1="0" y1="{330 - charge_limit_height}" x2="{width * 24}" y2="{330 - charge_limit_height}" stroke="yellow" stroke-width="2"/>
-        """
+        """)
 
         # Erzeuge SVG für jeden Balken und Beschriftung basierend auf den Daten
         for hour, price in data.items():
             # Standardfarbe: Grau
             color = "gray" if current_hour > hour else "gainsboro"
-            pattern = ""  # Initialisiere pattern
 
             if tomorrow:
                 color = "gainsboro"
 
             # Überprüfe Überlappung mit Streifen für rote und grüne Stunden
             if price is not None:
-                if price < self.config.charging_price_limit or hour in green_hours:
-                    if price < self.config.charging_price_hard_cap:
+                if price < charging_price_limit or hour in green_hours:
+                    if price < charging_price_hard_cap:
                         color = "green" if current_hour > hour else "#32CD32"
                 elif hour in red_hours and hour not in green_hours:
                     color = "darkred" if current_hour > hour else "red"
 
                 if tomorrow:
-                    if price < self.config.charging_price_limit or hour in green_hours:
-                        if price < self.config.charging_price_hard_cap:
+                    if price < charging_price_limit or hour in green_hours:
+                        if price < charging_price_hard_cap:
                             color = "#32CD32"
                     elif hour in red_hours and hour not in green_hours:
                         color = "red"
@@ -342,15 +554,13 @@ class SEUSSWeb:
                 height = factor
                 y = 330 - height
 
-            # Füge Balken hinzu
-            svg += f"""
-            <rect x="{hour * width}" y="{y}" width="{width - 3}" height="{height}" fill="{color}" stroke="#000" stroke-width="1" {f'fill="{pattern}"' if pattern else ""}/>
-            """
-
-            # Füge Stunden-Beschriftung hinzu innerhalb der Gruppe
-            svg += f"""
+            # Füge Balken und Stunden-Beschriftung hinzu
+            svg.append(f"""
+            <rect x="{hour * width}" y="{y}" width="{width - 3}" height="{height}" fill="{color}" stroke="#000" stroke-width="1" />
+            """)
+            svg.append(f"""
             <text x="{hour * width + 15}" y="345" text-anchor="middle" font-size="10">{hour}</text>
-            """
+            """)
 
             if price is None:
                 price = ""
@@ -359,94 +569,50 @@ class SEUSSWeb:
             if height > 330:
                 # Preis wird innerhalb des Balkens angezeigt (Kontrastfarbe)
                 price_color = "white" if (color != "gray" and color != "gainsboro") else "black"  # Kontrastfarbe wählen
-                svg += f"""
+                svg.append(f"""
                 <text x="{hour * width + 15}" y="15" text-anchor="middle" font-size="10" fill="{price_color}">{price}</text>
-                """
+                """)
             else:
                 # Standardposition für den Preis oberhalb des Balkens
-                svg += f"""
+                svg.append(f"""
                 <text x="{hour * width + 15}" y="{y - 5}" text-anchor="middle" font-size="10" fill="{color}">{price}</text>
-                """
-#            # Füge Preis-Beschriftung hinzu innerhalb der Gruppe
-#            svg += f"""
-#            <text x="{hour * width + 15}" y="{y - 5}" text-anchor="middle" font-size="10" fill="{color}">{price}</text>
-#            """
-
-        charge_hard_cap_height = (abs(self.config.charging_price_hard_cap) + 1) * factor
-        svg += f"""
+                """)
+
+        charge_hard_cap_height = (abs(charging_price_hard_cap) + 1) * factor
+        svg.append(f"""
         <line x1="0" y1="{330 - charge_hard_cap_height}" x2="{width * 24}" y2="{330 - charge_hard_cap_height}" stroke="blue" stroke-width="2"/>
-        """
+        """)
 
         # Schließe die Gruppe und SVG-Code
-        svg += """
+        svg.append("""
         </svg>
-        """
+        """)
 
-        return svg
+        return "".join(svg)
 
-    def generate_legend_svg(self):
-        average_price_today, average_price_tomorow = self.market_items.get_average_price_by_date(True)
+    def generate_legend_svg(self, average_prices=None):
+        if average_prices is None:
+            average_prices = self.market_items.get_average_price_by_date(True)
+        average_price_today, average_price_tomorow = average_prices
 
         # SVG-Code für die Legende
-        legend_svg = """
+        return f"""
         <svg width="240" height="195" xmlns="http://www.w3.org/2000/svg" style="border: 1px solid #ccc; margin: 25px;">
-        """
-
-        # Füge Rechteck für grüne Stunde hinzu
-        legend_svg += """
         <rect x="10" y="10" width="20" height="20" fill="green" stroke="#000" stroke-width="1"/>
-        """
-
-        # Füge Text für grüne Stunde hinzu
-        legend_svg += """
         <text x="40" y="25" font-size="12">Charging</text>
-        """
-
-        # Füge Rechteck für rote Stunde hinzu
-        legend_svg += """
         <rect x="10" y="40" width="20" height="20" fill="red" stroke="#000" stroke-width="1"/>
-        """
-
-        # Füge Text für rote Stunde hinzu
-        legend_svg += """
         <text x="40" y="55" font-size="12">Discharging</text>
-        """
-
-        legend_svg += """
         <rect x="10" y="75" width="20" height="4" fill="magenta" stroke="#000" stroke-width="1"/>
-        """
-        legend_svg += f"""
         <text x="40" y="85" font-size="12">Average Today ({average_price_today})</text>
-        """
-
-        legend_svg += """
         <rect x="10" y="105" width="20" height="4" fill="magenta" stroke="#000" stroke-width="1"/>
-        """
-        legend_svg += f"""
         <text x="40" y="115" font-size="12">Average Tomorrow ({average_price_tomorow})</text>
-        """
-
-        legend_svg += """
         <rect x="10" y="135" width="20" height="4" fill="yellow" stroke="#000" stroke-width="1"/>
-        """
-        legend_svg += f"""
         <text x="40" y="145" font-size="12">Charging Price Limit ({self.config.charging_price_limit})</text>
-        """
-
-        legend_svg += """
         <rect x="10" y="165" width="20" height="4" fill="blue" stroke="#000" stroke-width="1"/>
-        """
-        legend_svg += f"""
         <text x="40" y="175" font-size="12">Charging Price Hard Cap ({self.config.charging_price_hard_cap})</text>
-        """
-
-        # Schließe die SVG-Code
-        legend_svg += """
         </svg>
         """
 
-        return legend_svg
-
     def calculate_slider_percentages(self, current_soc, solar_expectation):
         # Normalize the SOC to a value between 0 and 100
         normalized_soc = min(100, max(0, current_soc))
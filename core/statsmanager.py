@@ -28,6 +28,9 @@
 from datetime import datetime
 import json
 import os, sys
+import atexit
+import threading
+import time
 
 from design_patterns.singleton import Singleton
 
@@ -39,140 +42,326 @@ class StatsManager(Singleton):
     main_script_path = os.path.abspath(sys.argv[0])
     main_script_directory = os.path.dirname(main_script_path)
     file_path = os.path.join(main_script_directory, 'status.json')
+    # Jede Änderung wird als eine Zeile angehängt, status.json ist nur der Stand der letzten Verdichtung
+    journal_path = os.path.join(main_script_directory, 'status.journal')
+    max_journal_entries = 5000
+    max_journal_files = 7  # Rotierte Journale bleiben als Verlauf für get_history erhalten
+    flush_interval = 10.0  # Sekunden, in denen Änderungen gesammelt werden
 
     data = {}
+    loaded = False
+    journal = None
+    journal_entries = 0
+    dirty = {}  # group -> geänderte Keys seit dem letzten flush
+    flush_timer = None
+    lock = threading.RLock()
 
     def __new__(cls):
         return super().__new__(cls)
 
     def __init__(self):
         super().__init__()
-        self.load_data()
+        self.ensure_loaded()
 
     @classmethod
     def load_data(cls):
-        try:
-            with open(cls.file_path, 'r') as file:
-                cls.data = json.load(file)
-        except (FileNotFoundError, json.decoder.JSONDecodeError):
-            cls.data = {}
+        with cls.lock:
+            try:
+                with open(cls.file_path, 'r') as file:
+                    cls.data = json.load(file)
+            except (FileNotFoundError, json.decoder.JSONDecodeError):
+                cls.data = {}
+
+            cls.close_journal()
+            cls.journal_entries = 0
+            for entry in cls.read_journal(cls.journal_path):
+                cls.apply_entry(entry)
+                cls.journal_entries += 1
+            cls.loaded = True
+
+            if cls.journal_entries >= cls.max_journal_entries:
+                cls.save_data()
 
     @classmethod
     def save_data(cls):
-        with open(cls.file_path, 'w') as file:
-            json.dump(cls.data, file, indent=4)
+        """Writes a full snapshot atomically and starts a new journal, the old one is kept as history."""
+        with cls.lock:
+            # Offene Änderungen zuerst ins Journal, damit sie auch im Verlauf stehen
+            cls.flush()
+
+            temp_path = cls.file_path + '.tmp'
+            with open(temp_path, 'w') as file:
+                json.dump(cls.data, file, indent=4)
+                # Erst auf die SD-Karte schreiben, sonst kann nach einem Stromausfall eine leere Datei übrig bleiben
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, cls.file_path)
+            cls.fsync_directory(cls.file_path)
+
+            cls.close_journal()
+            cls.rotate_journals()
+            cls.journal_entries = 0
+
+    @classmethod
+    def ensure_loaded(cls):
+        # Vor der ersten Änderung laden, sonst würde eine spätere Verdichtung den gespeicherten Stand überschreiben
+        if not cls.loaded:
+            cls.load_data()
+
+    @classmethod
+    def mark_dirty(cls, group, *keys):
+        """Marks keys as changed, they are written to the journal by the next flush. Repeated changes
+        of the same key within one flush interval end up as a single journal line."""
+        with cls.lock:
+            cls.dirty.setdefault(group, set()).update(keys)
+            if cls.flush_timer is None:
+                cls.flush_timer = threading.Timer(cls.flush_interval, cls.flush)
+                cls.flush_timer.daemon = True
+                cls.flush_timer.start()
+
+    @classmethod
+    def flush(cls):
+        """Appends the current values of all dirty keys to the journal, deleted keys are recorded as such."""
+        with cls.lock:
+            if cls.flush_timer is not None:
+                cls.flush_timer.cancel()
+                cls.flush_timer = None
+
+            if not cls.dirty:
+                return
+
+            timestamp = round(time.time(), 1)
+            lines = []
+            for group, keys in cls.dirty.items():
+                group_data = cls.data.get(group, {})
+                for key in sorted(keys):
+                    entry = {'t': timestamp, 'g': group, 'k': key}
+                    if key in group_data:
+                        entry['v'] = group_data[key]
+                    else:
+                        entry['d'] = 1
+                    lines.append(json.dumps(entry, separators=(',', ':')) + '\n')
+            cls.dirty = {}
+
+            if cls.journal is None:
+                cls.journal = open(cls.journal_path, 'a')
+            cls.journal.write(''.join(lines))
+            cls.journal.flush()
+            os.fsync(cls.journal.fileno())
+            cls.journal_entries += len(lines)
+
+            if cls.journal_entries >= cls.max_journal_entries:
+                cls.save_data()
+
+    @staticmethod
+    def fsync_directory(path):
+        """Persists a rename in the directory of ``path``, not every platform allows this."""
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    @classmethod
+    def apply_entry(cls, entry):
+        group_data = cls.data.setdefault(entry['g'], {})
+        if 'v' in entry:
+            group_data[entry['k']] = entry['v']
+        else:
+            group_data.pop(entry['k'], None)
+
+    @staticmethod
+    def read_journal(path):
+        try:
+            with open(path, 'r') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.decoder.JSONDecodeError:
+                        continue  # Unvollständige letzte Zeile nach einem Absturz
+                    if isinstance(entry, dict) and 'g' in entry and 'k' in entry:
+                        yield entry
+        except FileNotFoundError:
+            return
+
+    @classmethod
+    def rotate_journals(cls):
+        if not os.path.exists(cls.journal_path):
+            return
+
+        oldest = f"{cls.journal_path}.{cls.max_journal_files}"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for index in range(cls.max_journal_files - 1, 0, -1):
+            path = f"{cls.journal_path}.{index}"
+            if os.path.exists(path):
+                os.replace(path, f"{cls.journal_path}.{index + 1}")
+        os.replace(cls.journal_path, f"{cls.journal_path}.1")
+
+    @classmethod
+    def close_journal(cls):
+        if cls.journal is not None:
+            cls.journal.close()
+            cls.journal = None
+
+    @classmethod
+    def get_history(cls, group, key, since=None):
+        """Recorded values of ``group``/``key`` as (timestamp, value) tuples, oldest first."""
+        with cls.lock:
+            cls.flush()
+
+            paths = [f"{cls.journal_path}.{index}" for index in range(cls.max_journal_files, 0, -1)]
+            paths.append(cls.journal_path)
+
+            history = []
+            for path in paths:
+                for entry in cls.read_journal(path):
+                    if entry['g'] == group and entry['k'] == key and 'v' in entry:
+                        if since is None or entry['t'] >= since:
+                            history.append((entry['t'], entry['v']))
+            return history
 
     @classmethod
     def insert_new_daily_status_data(cls, group, key, value):
-        # cls.cleanup_old_entries(group)  # Clean up old entries before inserting new data
+        with cls.lock:
+            cls.ensure_loaded()
 
-        date_key = f"date_{key}"
-        today = datetime.now().strftime('%Y-%m-%d')
+            # cls.cleanup_old_entries(group)  # Clean up old entries before inserting new data
 
-        if group not in StatsManager.data:
-            cls.data[group] = {}
+            date_key = f"date_{key}"
+            today = datetime.now().strftime('%Y-%m-%d')
 
-        if date_key not in cls.data[group] or cls.data[group][date_key] != today:
-            # If the date key doesn't exist or is not today, update the entry
-            current_value = cls.data[group].get(key)
-            if current_value is not None:
-                if value > current_value:
-                    current_value = value - current_value
-                    cls.update_percent_status_data(group, 'average', current_value, 30)
+            if group not in StatsManager.data:
+                cls.data[group] = {}
 
-            cls.data[group][date_key] = today
-            cls.data[group][key] = value
-            cls.save_data()
+            if date_key not in cls.data[group] or cls.data[group][date_key] != today:
+                # If the date key doesn't exist or is not today, update the entry
+                current_value = cls.data[group].get(key)
+                if current_value is not None:
+                    if value > current_value:
+                        current_value = value - current_value
+                        cls.update_percent_status_data(group, 'average', current_value, 30)
+
+                cls.data[group][date_key] = today
+                cls.data[group][key] = value
+                cls.mark_dirty(group, date_key, key)
 
     @classmethod
     def insert_new_status_data(cls, group, key, value):
-        if not isinstance(value, (int, float)) or isinstance(value, bool):
-            return
+        with cls.lock:
+            cls.ensure_loaded()
 
-        date_key = f"date_{key}"
-        today = datetime.now().strftime('%Y-%m-%d')
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return
 
-        if group not in StatsManager.data:
-            cls.data[group] = {}
+            date_key = f"date_{key}"
+            today = datetime.now().strftime('%Y-%m-%d')
 
-        if date_key not in cls.data[group]:
-            # If the date key doesn't exist or is not today, update the entry
-            cls.data[group][date_key] = today
-            cls.data[group][key] = value
-            cls.save_data()
+            if group not in StatsManager.data:
+                cls.data[group] = {}
+
+            if date_key not in cls.data[group]:
+                # If the date key doesn't exist or is not today, update the entry
+                cls.data[group][date_key] = today
+                cls.data[group][key] = value
+                cls.mark_dirty(group, date_key, key)
 
     @classmethod
     def set_status_data(cls, group, key, value):
-        if not isinstance(value, (int, float)) or isinstance(value, bool):
-            return
+        with cls.lock:
+            cls.ensure_loaded()
 
-        date_key = f"date_{key}"
-        today = datetime.now().strftime('%Y-%m-%d')
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return
 
-        if group not in StatsManager.data:
-            cls.data[group] = {}
+            date_key = f"date_{key}"
+            today = datetime.now().strftime('%Y-%m-%d')
 
-        cls.data[group][date_key] = today
-        cls.data[group][key] = value
-        cls.save_data()
+            if group not in StatsManager.data:
+                cls.data[group] = {}
+
+            cls.data[group][date_key] = today
+            cls.data[group][key] = value
+            cls.mark_dirty(group, date_key, key)
+
+    @classmethod
+    def set_data(cls, group, key, value):
+        """Stores any JSON serializable value, e.g. a list of profile buckets."""
+        with cls.lock:
+            cls.ensure_loaded()
+
+            cls.data.setdefault(group, {})[key] = value
+            cls.mark_dirty(group, key)
 
     @classmethod
     def insert_peek_data(cls, key, value):
-        if not isinstance(value, (int, float)) or isinstance(value, bool):
-            return
+        with cls.lock:
+            cls.ensure_loaded()
 
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return
 
-        if 'peek' not in cls.data:
-            cls.data['peek'] = {}
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        if key in cls.data['peek']:
-            existing_value = cls.data['peek'][key]['value']
-            if existing_value < value:
-                cls.data['peek'][key] = {'value': value, 'timestamp': now}
+            if 'peek' not in cls.data:
+                cls.data['peek'] = {}
+
+            if key in cls.data['peek']:
+                existing_value = cls.data['peek'][key]['value']
+                if existing_value < value:
+                    cls.data['peek'][key] = {'value': value, 'timestamp': now}
+                else:
+                    return round(existing_value, 2), cls.data['peek'][key]['timestamp']
             else:
-                return round(existing_value, 2), cls.data['peek'][key]['timestamp']
-        else:
-            cls.data['peek'][key] = {'value': value, 'timestamp': now}
+                cls.data['peek'][key] = {'value': value, 'timestamp': now}
 
-        cls.save_data()
+            cls.mark_dirty('peek', key)
 
-        return round(value, 2), now
+            return round(value, 2), now
 
     @classmethod
     def update_percent_status_data(cls, group, key, new_value, max_count=1000):
-        if not isinstance(new_value, (int, float)) or isinstance(new_value, bool):
-            return None
+        with cls.lock:
+            cls.ensure_loaded()
 
-        date_key = f"date_{key}"
-        today = datetime.now().strftime('%Y-%m-%d')
+            if not isinstance(new_value, (int, float)) or isinstance(new_value, bool):
+                return None
 
-        if group not in cls.data:
-            cls.insert_new_status_data(group, key, new_value)
+            date_key = f"date_{key}"
+            today = datetime.now().strftime('%Y-%m-%d')
 
-        cls.data[group][date_key] = today
-        value = new_value
+            if group not in cls.data:
+                cls.insert_new_status_data(group, key, new_value)
 
-        if key in cls.data[group]:
-            if isinstance(cls.data[group][key], list):
-                value, count = cls.data[group][key]
-                if count >= max_count:
-                    e_value = value * count
-                    e_value = (e_value - value)
-                    count -= 1
-                    value = e_value / count
+            cls.data[group][date_key] = today
+            value = new_value
+
+            if key in cls.data[group]:
+                # Aus JSON kommt eine Liste, ältere Stände im Speicher können noch ein Tupel sein
+                if isinstance(cls.data[group][key], (list, tuple)):
+                    value, count = cls.data[group][key]
+                    if count >= max_count:
+                        e_value = value * count
+                        e_value = (e_value - value)
+                        count -= 1
+                        value = e_value / count
+                else:
+                    count = 1
+
+                value = (count * value + new_value) / (count + 1)
+                count += 1
+                cls.data[group][key] = [value, count]
             else:
-                count = 1
+                cls.data[group][key] = [new_value, 1]
 
-            value = (count * value + new_value) / (count + 1)
-            count += 1
-            cls.data[group][key] = (value, count)
-        else:
-            cls.data[group][key] = (new_value, 1)
-
-        cls.save_data()
+            cls.mark_dirty(group, date_key, key)
 
-        return round(value, 2)
+            return round(value, 2)
 
     @classmethod
     def calculate_factor(cls, value1, value2):
@@ -182,28 +371,35 @@ class StatsManager(Singleton):
 
     @classmethod
     def cleanup_old_entries(cls, group_to_cleanup):
-        today = datetime.now().strftime('%Y-%m-%d')
+        with cls.lock:
+            cls.ensure_loaded()
+
+            today = datetime.now().strftime('%Y-%m-%d')
 
-        if group_to_cleanup in cls.data:
-            entries_to_delete = []
+            if group_to_cleanup in cls.data:
+                entries_to_delete = []
 
-            for key, entry in cls.data[group_to_cleanup].items():
-                if key.startswith('date_'):
-                    entry_date = entry
-                    if entry_date != today:
-                        entries_to_delete.append(key.replace('date_', ''))
-                        entries_to_delete.append(key)
+                for key, entry in cls.data[group_to_cleanup].items():
+                    if key.startswith('date_'):
+                        entry_date = entry
+                        if entry_date != today:
+                            entries_to_delete.append(key.replace('date_', ''))
+                            entries_to_delete.append(key)
 
-            for entry_key in entries_to_delete:
-                del cls.data[group_to_cleanup][entry_key]
+                for entry_key in entries_to_delete:
+                    del cls.data[group_to_cleanup][entry_key]
 
-            cls.save_data()
+                if entries_to_delete:
+                    cls.mark_dirty(group_to_cleanup, *entries_to_delete)
 
     @classmethod
     def remove_data(cls, group, key):
-        if group in cls.data and key in cls.data[group]:
-            del cls.data[group][key]
-            cls.save_data()
+        with cls.lock:
+            cls.ensure_loaded()
+
+            if group in cls.data and key in cls.data[group]:
+                del cls.data[group][key]
+                cls.mark_dirty(group, key)
 
     @classmethod
     def get_data(cls, group, key):
@@ -231,3 +427,6 @@ class StatsManager(Singleton):
     @classmethod
     def get_power_events(cls, event_type):
         return cls.power_events.get(event_type, [])
+
+
+atexit.register(StatsManager.flush)
@@ -28,17 +28,112 @@
 from websockets.sync.server import serve as ws_serv
 import websockets
 import json
+import logging
+import threading
+from collections import deque
+from logzero import logger as logzero_logger
+from core.config import Config
 from core.log import CustomLogger
+from core.logreader import LogTail, LogReader
+
+
+class LogNotifyHandler(logging.Handler):
+    """Wakes up the log push thread whenever a record is logged."""
+
+    def __init__(self, event):
+        super().__init__()
+        self.event = event
+
+    def emit(self, record):
+        self.event.set()
+
+
+class ClientSender:
+    """Bounded send queue of one client, drained by its own thread so producers never block on a slow client."""
+
+    def __init__(self, websocket, maxsize=64):
+        self.websocket = websocket
+        self.maxsize = maxsize
+        self.queue = deque()  # (key, message)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def put(self, message, key=None, conflated=None):
+        """Queues an already serialized message. A queued message with the same key is replaced by
+        ``conflated`` (a message or a callable returning one), by default by the new message itself."""
+        with self.condition:
+            if self.closed:
+                return False
+
+            if key is not None:
+                for index, (queued_key, _) in enumerate(self.queue):
+                    if queued_key == key:
+                        if conflated is None:
+                            conflated = message
+                        self.queue[index] = (key, conflated() if callable(conflated) else conflated)
+                        return True
+
+            if len(self.queue) >= self.maxsize:
+                # Client kommt nicht mehr nach, beim Neuverbinden bekommt er wieder einen vollständigen Stand
+                self.closed = True
+                self.queue.clear()
+                self.condition.notify_all()
+                return False
+
+            self.queue.append((key, message))
+            self.condition.notify()
+            return True
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    break
+                _, message = self.queue.popleft()
+
+            try:
+                self.websocket.send(message)
+            except Exception:
+                self.closed = True
+                break
+
+        # Schließt die Verbindung, der Handler-Thread räumt den Client dann auf
+        try:
+            self.websocket.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.queue.clear()
+            self.condition.notify_all()
+
 
 class WebSocketServer:
+    LOG_LEVELS = {'D': logging.DEBUG, 'I': logging.INFO, 'W': logging.WARNING, 'E': logging.ERROR, 'C': logging.CRITICAL}
+    CHANNELS = ('power', 'soc', 'price', 'decision')
+
     def __init__(self):
-        self.clients = set()  # Set of connected clients
+        self.clients = {}  # websocket -> ClientSender
         self.logger = CustomLogger()
-        self.last_message = None
+        self.channel_state = {}  # Kanal -> zuletzt veröffentlichte Felder
+        self.channel_clients = {channel: set() for channel in self.CHANNELS}
+        self.channel_lock = threading.Lock()
+        self.log_clients = {}  # websocket -> [minimaler Log-Level, Cursor im LogTail]
+        self.log_lock = threading.Lock()
+        self.log_event = threading.Event()
+        self.log_thread = None
+        logzero_logger.addHandler(LogNotifyHandler(self.log_event))
 
     def handler(self, websocket):
         """Handles incoming WebSocket connections synchronously."""
-        self.clients.add(websocket)
+        sender = ClientSender(websocket)
+        self.clients[websocket] = sender
         try:
             remote_address = websocket.socket.getpeername()
             # self.logger.log_info(f"Client connected: {remote_address}")
@@ -46,42 +141,176 @@ class WebSocketServer:
             self.logger.log_error(f"Could not determine client address: {e}")
             remote_address = None
 
-        if self.last_message:
-            try:
-                websocket.send(json.dumps(self.last_message))
-                # self.logger.log_info(f"Sent last message to new client: {self.last_message}")
-            except Exception as e:
-                self.logger.log_error(f"Error sending last message: {e}")
-
         try:
             # Waiting for incoming messages from the client
             while True:
                 message = websocket.recv()
-                self.logger.log_debug(f"Message from client: {message}")
+                self.logger.log_debug("Message from client: %s", message)
+                self.handle_client_message(websocket, message)
         except websockets.exceptions.ConnectionClosed as e:
-            self.logger.log_debug(f"Connection closed: {e}")
+            self.logger.log_debug("Connection closed: %s", e)
         finally:
             # Remove the client from the list of connections
-            self.clients.discard(websocket)
+            self.clients.pop(websocket, None)
+            sender.close()
+            self.unsubscribe_log(websocket)
+            for channel in self.CHANNELS:
+                self.unsubscribe_channel(websocket, channel)
             if remote_address:
                 self.logger.log_debug(f"Client disconnected: {remote_address}")
 
-    def send_data_to_all_clients(self, message):
-        """Sends a message to all connected WebSocket clients synchronously."""
-        self.last_message = json.dumps(message)
-        if not self.clients:
-            # self.logger.log_info("No connected clients")
+    def handle_client_message(self, websocket, message):
+        """Clients subscribe to a channel with {"action": "subscribe", "channel": "power"}.
+        The log channel additionally takes a minimal level: {"action": "subscribe", "channel": "log", "level": "INFO"}."""
+        try:
+            data = json.loads(message)
+        except (TypeError, ValueError):
             return
-        for client in list(self.clients):
-            try:
-                client.send(json.dumps(message))
-                # self.logger.log_info(f"Message sent to client: {message}")
-            except Exception as e:
-                self.logger.log_error(f"Error sending message to client: {e}")
-                self.clients.discard(client)  # Remove faulty clients
-
-    def emit_ws(self, message):
-        self.send_data_to_all_clients(message)
+
+        if not isinstance(data, dict):
+            return
+
+        channel = data.get('channel')
+        action = data.get('action')
+        if channel == 'log':
+            if action == 'subscribe':
+                self.subscribe_log(websocket, data.get('level', 'DEBUG'))
+            elif action == 'unsubscribe':
+                self.unsubscribe_log(websocket)
+        elif channel in self.CHANNELS:
+            if action == 'subscribe':
+                self.subscribe_channel(websocket, channel)
+            elif action == 'unsubscribe':
+                self.unsubscribe_channel(websocket, channel)
+
+    def publish(self, channel, fields):
+        """Publishes the current fields of a channel, subscribers only receive the fields that changed."""
+        with self.channel_lock:
+            state = self.channel_state.setdefault(channel, {})
+            delta = {key: value for key, value in fields.items() if key not in state or state[key] != value}
+            if not delta:
+                return
+
+            state.update(delta)
+            subscribers = self.channel_clients.get(channel)
+            if not subscribers:
+                return
+
+            payload = json.dumps({'channel': channel, 'reset': False, 'data': delta})
+            snapshot = []
+
+            def get_snapshot():
+                # Ersetzt ein noch nicht gesendetes Delta, damit keine Änderung verloren geht
+                if not snapshot:
+                    snapshot.append(self.encode_snapshot(channel, state))
+                return snapshot[0]
+
+            for websocket in list(subscribers):
+                sender = self.clients.get(websocket)
+                if sender is None or not sender.put(payload, channel, get_snapshot):
+                    subscribers.discard(websocket)
+
+    def subscribe_channel(self, websocket, channel):
+        with self.channel_lock:
+            sender = self.clients.get(websocket)
+            if sender is None:
+                return
+            self.channel_clients[channel].add(websocket)
+            sender.put(self.encode_snapshot(channel, self.channel_state.get(channel, {})), channel)
+
+    def unsubscribe_channel(self, websocket, channel):
+        with self.channel_lock:
+            self.channel_clients[channel].discard(websocket)
+
+    @staticmethod
+    def encode_snapshot(channel, state):
+        return json.dumps({'channel': channel, 'reset': True, 'data': state})
+
+    def subscribe_log(self, websocket, level):
+        min_level = logging.getLevelName(str(level).upper())
+        if not isinstance(min_level, int):
+            min_level = logging.DEBUG
+
+        tail = self.get_log_tail()
+        tail.poll()
+        lines, cursor, _ = tail.get_lines_since(None)
+        with self.log_lock:
+            self.log_clients[websocket] = [min_level, cursor]
+            # Erst senden, wenn der Client eingetragen ist, damit keine Zeile verloren geht
+            self.send_log_lines(websocket, lines, min_level, True)
+
+            if self.log_thread is None or not self.log_thread.is_alive():
+                self.log_thread = threading.Thread(target=self.push_log_lines, daemon=True)
+                self.log_thread.start()
+
+    def unsubscribe_log(self, websocket):
+        with self.log_lock:
+            self.log_clients.pop(websocket, None)
+
+    @staticmethod
+    def get_log_tail():
+        return LogTail.get_instance(Config().log_file_path)
+
+    def push_log_lines(self):
+        """Sends newly written log lines to all subscribed clients until the last one unsubscribes."""
+        tail = self.get_log_tail()
+        while True:
+            # Fallback-Intervall, falls der Eintrag erst verzögert in der Datei landet
+            self.log_event.wait(1.0)
+            self.log_event.clear()
+            tail.poll()
+
+            with self.log_lock:
+                if not self.log_clients:
+                    self.log_thread = None
+                    return
+
+                # Clients mit gleichem Cursor und Level bekommen dieselbe, nur einmal serialisierte Nachricht
+                payloads = {}
+                for websocket, subscription in list(self.log_clients.items()):
+                    min_level, cursor = subscription
+                    if (cursor, min_level) not in payloads:
+                        lines, next_cursor, reset = tail.get_lines_since(cursor)
+                        payloads[(cursor, min_level)] = (self.encode_log_lines(lines, min_level, reset), next_cursor)
+
+                    payload, subscription[1] = payloads[(cursor, min_level)]
+                    if payload is not None:
+                        self.send_log_payload(websocket, payload)
+
+    def send_log_lines(self, websocket, lines, min_level, reset):
+        payload = self.encode_log_lines(lines, min_level, reset)
+        if payload is not None:
+            self.send_log_payload(websocket, payload)
+
+    def encode_log_lines(self, lines, min_level, reset):
+        lines = self.filter_log_lines(lines, min_level)
+        if not lines and not reset:
+            return None
+        return json.dumps({'channel': 'log', 'reset': reset, 'lines': lines})
+
+    def send_log_payload(self, websocket, payload):
+        sender = self.clients.get(websocket)
+        if sender is None or not sender.put(payload):
+            self.log_clients.pop(websocket, None)
+            self.logger.log_debug("Log client dropped, send queue is full or closed.")
+
+    @classmethod
+    def filter_log_lines(cls, lines, min_level):
+        """Colorizes the lines, lines below min_level are filtered out on the server side."""
+        result = []
+        keep = True
+        for line in lines:
+            if len(line) > 1 and line[0] == '[' and line[1] in cls.LOG_LEVELS:
+                keep = cls.LOG_LEVELS[line[1]] >= min_level
+            # Folgezeilen (z.B. Tracebacks) übernehmen den Level der vorherigen Zeile
+            if keep:
+                colored_line = LogReader.colorize_log_level(line)
+                if colored_line:
+                    result.append(colored_line)
+        return result
+
+    def emit_ws(self, message, channel='power'):
+        self.publish(channel, message)
 
     def run(self, host="0.0.0.0", port=8765):
         """Starts the WebSocket server synchronously."""
@@ -32,7 +32,7 @@ import sys
 from typing import Tuple
 
 from core.log import CustomLogger
-from core.mqttclient import MqttClient, MqttResult, Subscribers, PvInverterResults, GridMetersResults
+from core.mqttclient import MqttClient, MqttTopicCache, PvInverterResults, GridMetersResults
 from essunit.abstract_classes.essunit import ESSUnit, ESSStatus
 from core.config import Config
 
@@ -48,7 +48,8 @@ class Victron(ESSUnit):
         self.password = kwargs.get("password", "")
         self.max_discharge_power = kwargs.get("max_discharge_power", -1)
         self.mqtt_port = 1883
-        self.subsribers = Subscribers()
+        self.timeout = 15
+        self.topics = {}
         self.inverters = PvInverterResults()
         self.gridmeters = GridMetersResults()
 
@@ -75,6 +76,8 @@ class Victron(ESSUnit):
             "mqtt_port": self.mqtt_port,
             "unit_id": self.unit_id
         }
+        self.state = MqttTopicCache.get_instance(self.mqtt_config, f"N/{self.unit_id}", f"R/{self.unit_id}/keepalive",
+                                                owner=self._name)
         self._get_data()
 
         # self.mqtt = MqttClient(self.mqtt_config)
@@ -85,7 +88,7 @@ class Victron(ESSUnit):
         only_observation_value = victron_ess_unit.get('only_observation') if victron_ess_unit else False
 
         if not enabled_value or only_observation_value:
-            self.logger.log_debug(f"ESS Unit {self._name} handle configuration change.")
+            self.logger.log_debug("ESS Unit %s handle configuration change.", self._name)
             self.logger.log_info(f"ESS Unit {self._name} has been disabled or in observation mode.")
             self.logger.log_info(f"Charging mode is deactivated.")
             self.logger.log_info(f"Discharge mode is activated.")
@@ -94,7 +97,7 @@ class Victron(ESSUnit):
 
     def get_battery_current_voltage(self):
         try:
-            currentvoltage = self._process_result(self.subsribers.get('Battery', 'Voltage'))
+            currentvoltage = self._get_value('Battery', 'Voltage')
             currentvoltage = round(float(currentvoltage), 2)
             self.logger.log_info(f"{self._name} Batterie Voltage: {currentvoltage} V")
             return currentvoltage
@@ -108,44 +111,44 @@ class Victron(ESSUnit):
         full_capacity = (self.get_battery_capacity() / soc) * 100 if soc > 0 else 0.0
         battery_capacity_wh = full_capacity * 55.20
         battery_current_wh = ((soc or 0) / 100) * battery_capacity_wh
-        self.logger.log_debug(f"{self._name} Batterie Current wh: {battery_current_wh}Wh")
+        self.logger.log_debug("%s Batterie Current wh: %sWh", self._name, battery_current_wh)
         return battery_current_wh
 
     def get_battery_minimum_soc_limit(self):
-        minimumsoclimit = self._process_result(self.subsribers.get('Battery', 'MinimumSocLimit'))
-        self.logger.log_debug(f"{self._name} Batterie MinimumSocLimit: {minimumsoclimit}%")
+        minimumsoclimit = self._get_value('Battery', 'MinimumSocLimit')
+        self.logger.log_debug("%s Batterie MinimumSocLimit: %s%%", self._name, minimumsoclimit)
         return minimumsoclimit
 
     def get_battery_capacity(self):
-        capacity = self._process_result(self.subsribers.get('Battery', 'Capacity'))
-        self.logger.log_debug(f"{self._name} Batterie capacity: {capacity} Ah")
+        capacity = self._get_value('Battery', 'Capacity')
+        self.logger.log_debug("%s Batterie capacity: %s Ah", self._name, capacity)
         return capacity
 
     def get_battery_installed_capacity(self):
-        installed_capacity = self._process_result(self.subsribers.get('Battery', 'InstalledCapacity'))
-        self.logger.log_debug(f"{self._name} Batterie installed capacity: {installed_capacity} Ah")
+        installed_capacity = self._get_value('Battery', 'InstalledCapacity')
+        self.logger.log_debug("%s Batterie installed capacity: %s Ah", self._name, installed_capacity)
         return installed_capacity
 
     def get_soc(self):
-        soc = self._process_result(self.subsribers.get('Battery', 'Soc'))
+        soc = self._get_value('Battery', 'Soc')
         self.logger.log_info(f"{self._name} SOC: {soc}%")
         return soc
 
     def get_scheduler_soc(self):
-        soc = self._process_result(self.subsribers.get('Schedule', 'Soc'))
+        soc = self._get_value('Schedule', 'Soc')
         self.logger.log_info(f"{self._name} Scheduler SOC: {soc}%")
         return soc
 
     def set_discharge(self, status):
         try:
             status_enum = ESSStatus(status.lower())
-            value = self._process_result(self.subsribers.get('DisCharge', 'MaxDischargePower'))
+            value = self._get_value('DisCharge', 'MaxDischargePower')
             if status_enum == ESSStatus.ON:
                 if value == self.max_discharge_power: return
-                self._publish(f"/{self.unit_id}/settings/0/Settings/CGwacs/MaxDischargePower", self.max_discharge_power)
+                self._publish({f"/{self.unit_id}/settings/0/Settings/CGwacs/MaxDischargePower": self.max_discharge_power})
             elif status_enum == ESSStatus.OFF:
                 if value == 0: return
-                self._publish(f"/{self.unit_id}/settings/0/Settings/CGwacs/MaxDischargePower", 0)
+                self._publish({f"/{self.unit_id}/settings/0/Settings/CGwacs/MaxDischargePower": 0})
 
         except (TypeError, ValueError) as e:
             self.logger.log_error(f"Error: {e}")
@@ -153,14 +156,15 @@ class Victron(ESSUnit):
     def set_charge(self, status):
         try:
             status_enum = ESSStatus(status.lower())
-            value = self._process_result(self.subsribers.get('Schedule', 'Day'))
+            value = self._get_value('Schedule', 'Day')
             if status_enum == ESSStatus.ON:
                 if value == 7: return
-                self._set_scheduler()
-                self._publish(f"/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Day", 7)
+                settings = self._set_scheduler({})
+                settings[f"/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Day"] = 7
+                self._publish(settings)
             elif status_enum == ESSStatus.OFF:
                 if value == -7: return
-                self._publish(f"/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Day", -7)
+                self._publish({f"/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Day": -7})
 
         except (TypeError, ValueError) as e:
             self.logger.log_error(f"Error: {e}")
@@ -174,70 +178,74 @@ class Victron(ESSUnit):
         return inverters
 
     def get_version(self):
-        version = self._process_result(self.subsribers.get('Firmware', 'Version'))
+        version = self._get_value('Firmware', 'Version')
         return version
 
     def _gridmeters(self):
-        with MqttClient(
-                self.mqtt_config) as mqtt:  # Hier wird die Verbindung hergestellt und im Anschluss automatisch geschlossen
-            base_topic = f'N/{self.unit_id}/grid'
-            discovery_topic = f"{base_topic}/#"
-            mqtt.subscribe(self.gridmeters, discovery_topic)
+        for topic, value in self.state.get_values(f'N/{self.unit_id}/grid/'):
+            self.gridmeters.set_value(topic, value)
 
     def _inverters(self):
-        with MqttClient(
-                self.mqtt_config) as mqtt:  # Hier wird die Verbindung hergestellt und im Anschluss automatisch geschlossen
-            base_topic = f'N/{self.unit_id}/pvinverter'
-            discovery_topic = f"{base_topic}/#"
-            mqtt.subscribe(self.inverters, discovery_topic)
+        for topic, value in self.state.get_values(f'N/{self.unit_id}/pvinverter/'):
+            self.inverters.set_value(topic, value)
 
-    def _get_battery_instance(self, mqtt):
+    def _get_battery_instance(self):
+        batteries = self.state.get_value(f"N/{self.unit_id}/system/0/Batteries")
         try:
-            mqtt_result = MqttResult()
-            rc = mqtt.subscribe(mqtt_result, f"N/{self.unit_id}/system/0/Batteries")
-            if rc == 0:
-                # Extrahieren des Werts
-                batteries = self._process_result(mqtt_result.result)
-
-                # Schleife durch die Batterien und finde die aktive Batterie
-                for battery in batteries:
-                    if battery.get('active_battery_service'):
-                        instance = battery.get('instance')
-                        return instance
-
-                # Falls keine aktive Batterie gefunden wurde
-                return None
-        except (TypeError, json.JSONDecodeError) as e:
-            self.logger.log_error(f"Error decoding JSON: {e}")
+            # Schleife durch die Batterien und finde die aktive Batterie
+            for battery in batteries or []:
+                if battery.get('active_battery_service'):
+                    instance = battery.get('instance')
+                    return instance
+        except (TypeError, AttributeError) as e:
+            self.logger.log_error(f"Error reading battery instance: {e}")
+
+        # Falls keine aktive Batterie gefunden wurde
+        return None
+
+    def _get_value(self, group, key):
+        topic = self.topics.get((group, key))
+        if topic is None:
             return None
 
-    def _set_scheduler(self):
-        duration = self._process_result(self.subsribers.get('Schedule', 'Duration'))
-        soc = self._process_result(self.subsribers.get('Schedule', 'Soc'))
-        if duration != 0 and soc != 0: return
+        if not self.state.is_fresh():
+            self.logger.log_warning(f"{self._name}: {group}/{key} may be outdated, no live connection to the MQTT broker.")
+
+        return self.state.get_value(topic)
+
+    def _set_scheduler(self, settings):
+        duration = self._get_value('Schedule', 'Duration')
+        soc = self._get_value('Schedule', 'Soc')
         if duration == 0:
-            self._publish(f"/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Duration", 86340)
+            settings[f"/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Duration"] = 86340
 
         if soc == 0:
-            self._publish(f"/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Soc", 100)
+            settings[f"/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Soc"] = 100
+
+        return settings
 
-    def _publish(self, topic, value):
-        name = topic.split("/")[-1]
-        data = {"value": value}
+    def _publish(self, settings):
+        """Publishes all W/ writes at once and confirms them from the N/ topics of the state cache."""
+        expected = {}
         with MqttClient(self.mqtt_config) as mqtt:
-            mqtt_result = MqttResult()
-            rc = mqtt.publish(f"W{topic}", json.dumps(data))
-            self.logger.log_debug(f"{self._name} {name}: rc={rc}")
-            if rc == 0:
-                if mqtt.subscribe(mqtt_result, f"N{topic}") == 0:
-                    value = self._process_result(mqtt_result.result)
-                    self.logger.log_debug(f"{self._name}: {name} {value}")
-
-    def _process_result(self, result):
-        if result is None: return None
-        parsed_result = json.loads(result)
-        value = parsed_result.get('value')
-        return value
+            for topic, value in settings.items():
+                rc = mqtt.publish(f"W{topic}", json.dumps({"value": value}))
+                self.logger.log_debug("%s %s: rc=%s", self._name, topic.split('/')[-1], rc)
+                if rc == 0:
+                    expected[f"N{topic}"] = value
+
+        if not expected:
+            return False
+
+        if not self.state.wait_for_values(expected, self.timeout):
+            for topic, value in expected.items():
+                self.logger.log_warning(
+                    f"{self._name}: {topic.split('/')[-1]} not confirmed, expected {value}, current {self.state.get_value(topic)}")
+            return False
+
+        for topic, value in expected.items():
+            self.logger.log_debug("%s: %s %s", self._name, topic.split('/')[-1], value)
+        return True
 
     def _is_resolvable(self, ip_address):
         try:
@@ -256,41 +264,38 @@ class Victron(ESSUnit):
         return "mqtt{}.victronenergy.com".format(broker_index)
 
     def _get_data(self):
+        if not self.state.start():
+            self.logger.log_error(f"Error: {self._name} could not connect to the MQTT broker.")
+            return
+
+        batteries_topic = f"N/{self.unit_id}/system/0/Batteries"
+        if not self.state.wait_for([batteries_topic], self.timeout):
+            self.logger.log_warning(f"Timeout MQTT Topic: {batteries_topic}.")
+
+        instance = self._get_battery_instance()
+        self.topics = {
+            ('Schedule', 'Day'): f"N/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Day",
+            ('Schedule', 'Duration'): f"N/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Duration",
+            ('Schedule', 'Soc'): f"N/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Soc",
+            ('Schedule', 'Start'): f"N/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Start",
+            ('Battery', 'Soc'): f"N/{self.unit_id}/system/0/Dc/Battery/Soc",
+            ('DisCharge', 'MaxDischargePower'): f"N/{self.unit_id}/settings/0/Settings/CGwacs/MaxDischargePower",
+            ('Battery', 'MinimumSocLimit'): f"N/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/MinimumSocLimit",
+            ('Battery', 'Voltage'): f"N/{self.unit_id}/battery/{instance}/Dc/0/Voltage",
+            ('Battery', 'Capacity'): f"N/{self.unit_id}/battery/{instance}/Capacity",
+            ('Battery', 'InstalledCapacity'): f"N/{self.unit_id}/battery/{instance}/InstalledCapacity",
+            ('Firmware', 'Version'): f"N/{self.unit_id}/platform/0/Firmware/Installed/Version"
+        }
+
+        if not self.state.wait_for(self.topics.values(), self.timeout):
+            self.logger.log_debug(lambda: f"Missing Topics: {self.state.get_missing_topics(self.topics.values())}")
+            self.logger.log_error(f"Error: Not all required values were provided. Check your ESS settings.")
+
+        # Beim ersten Durchlauf das Ende der vollständigen Übertragung abwarten, damit alle Geräte bekannt sind
+        self.state.wait_primed(2)
         self._inverters()
         self._gridmeters()
-        with MqttClient(
-                self.mqtt_config) as mqtt:  # Hier wird die Verbindung hergestellt und im Anschluss automatisch geschlossen
-            instance = self._get_battery_instance(mqtt)
-            topics_to_subscribe = [
-                f"Schedule:N/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Day",
-                f"Schedule:N/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Duration",
-                f"Schedule:N/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Soc",
-                f"Schedule:N/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/0/Start",
-                f"Battery:N/{self.unit_id}/system/0/Dc/Battery/Soc",
-                f"DisCharge:N/{self.unit_id}/settings/0/Settings/CGwacs/MaxDischargePower",
-                f"Battery:N/{self.unit_id}/settings/0/Settings/CGwacs/BatteryLife/MinimumSocLimit",
-                f"Battery:N/{self.unit_id}/battery/{instance}/Dc/0/Voltage",
-                f"Battery:N/{self.unit_id}/battery/{instance}/Capacity",
-                f"Battery:N/{self.unit_id}/battery/{instance}/InstalledCapacity",
-                f"Firmware:N/{self.unit_id}/platform/0/Firmware/Installed/Version"
-            ]
-
-            rc = mqtt.subscribe_multiple(self.subsribers, topics_to_subscribe)
-            if rc == 0:
-                if self.subsribers.count_topics(self.subsribers.subscribesValues) != self.subsribers.count_values(
-                        self.subsribers.subscribesValues):
-                    self.logger.log_error(f"Error: Not all required values were provided. Check your ESS settings.")
-                    return
-
-#                # Extrahieren des Werts
-#                self.logger.log_info(f"{self._name} Schedule Charge: {self._process_result(self.subsribers.get('Schedule', 'Day'))}")
-#                self.logger.log_info(f"{self._name} DisCharge: {self._process_result(self.subsribers.get('DisCharge', 'MaxDischargePower'))}")
-#                self.logger.log_info(f"{self._name} Battery Voltage: {self._process_result(self.subsribers.get('Battery', 'Voltage'))}")
-#                self.logger.log_info(f"{self._name} Battery Capacity: {self._process_result(self.subsribers.get('Battery', 'Capacity'))}")
-#                self.logger.log_info(f"{self._name} Battery/SOC: {self._process_result(self.subsribers.get('Battery', 'Soc'))}%")
-#                self.logger.log_info(f"{self._name} Schedule/Duration: {self._process_result(self.subsribers.get('Schedule', 'Duration'))}")
-#                self.logger.log_info(f"{self._name} Schedule/Soc: {self._process_result(self.subsribers.get('Schedule', 'Soc'))}")
-#                self.logger.log_info(f"{self._name} Battery/MinimumSocLimit: {self._process_result(self.subsribers.get('Battery', 'MinimumSocLimit'))}")
+
     def get_converter_efficiency(self) -> Tuple[float, float]:
         return 0.84, 0.90
 
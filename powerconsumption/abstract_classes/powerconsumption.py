@@ -32,6 +32,7 @@ import time
 
 from core.log import CustomLogger
 from core.statsmanager import StatsManager
+from powerconsumption.loadprofile import LoadProfile
 
 class PowerConsumptionBase:
     def __init__(self, interval_duration=5):
@@ -139,6 +140,11 @@ class PowerConsumptionBase:
             self.average = (value, count)
         else:
             avg_wh = 0
+
+        # Nur ausreichend lange gemessene Stunden fließen ins Wochenprofil ein
+        if elapsed_time >= 0.25:
+            bucket, old_wh, new_wh = LoadProfile.add_hour(self.hourly_start_time, avg_wh)
+            self.logger.log_debug("Load profile bucket %s: %s Wh -> %s Wh (measured %.2f Wh)", bucket, old_wh, new_wh, avg_wh)
         print(f"Hourly average for hour {self.current_hour}: {avg_wh:.4f} Wh")
         print(f"Hourly average : {value:.4f} Wh")
         self.statsmanager.update_percent_status_data("powerconsumption", "hourly_watt_average", value)
@@ -0,0 +1,80 @@
+#  -*- coding: utf-8 -*-
+#
+#  MIT License
+#
+#  Copyright (c) 2025 Christian Kvasny chris(at)ckvsoft.at
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+#
+#  Project: [SEUSS -> Smart Ess Unit Spotmarket Switcher
+#
+
+
+from datetime import datetime
+
+from core.statsmanager import StatsManager
+from core.timeutilities import TimeUtilities
+
+
+class LoadProfile:
+    """Expected consumption per hour of the week (168 buckets), exponentially weighted so recent weeks count more."""
+    BUCKETS = 7 * 24
+    alpha = 0.3  # Gewicht einer neuen Stunde gegenüber dem bisherigen Wert des Buckets
+    group = 'powerconsumption'
+    key = 'hour_of_week_wh'
+
+    @staticmethod
+    def get_bucket(timestamp):
+        local_time = datetime.fromtimestamp(timestamp, TimeUtilities.TZ)
+        return local_time.weekday() * 24 + local_time.hour
+
+    @classmethod
+    def get_buckets(cls):
+        buckets = StatsManager.get_data(cls.group, cls.key)
+        if not isinstance(buckets, list) or len(buckets) != cls.BUCKETS:
+            return [None] * cls.BUCKETS
+        return buckets
+
+    @classmethod
+    def add_hour(cls, timestamp, wh):
+        """Folds the consumption of the hour starting at ``timestamp`` into its bucket.
+        Returns the bucket index, its previous and its new value."""
+        buckets = list(cls.get_buckets())
+        bucket = cls.get_bucket(timestamp)
+        old = buckets[bucket]
+        buckets[bucket] = round(wh if old is None else old + cls.alpha * (wh - old), 2)
+        StatsManager.set_data(cls.group, cls.key, buckets)
+        return bucket, old, buckets[bucket]
+
+    @classmethod
+    def get_expected_wh(cls, start, end, default_hourly_wh=0.0):
+        """Integrates the expected consumption between two datetimes hour by hour.
+        Buckets without history fall back to ``default_hourly_wh``."""
+        buckets = cls.get_buckets()
+        current = start.timestamp()
+        end = end.timestamp()
+        total = 0.0
+        while current < end:
+            # Segmente an lokalen Stundengrenzen schneiden, Zeitzonen mit halben Stunden Versatz inklusive
+            hour_start = datetime.fromtimestamp(current, TimeUtilities.TZ).replace(minute=0, second=0, microsecond=0)
+            segment_end = min(hour_start.timestamp() + 3600, end)
+            value = buckets[cls.get_bucket(current)]
+            total += (segment_end - current) / 3600 * (value if value is not None else default_hourly_wh)
+            current = segment_end
+        return total
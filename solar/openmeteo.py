@@ -173,12 +173,12 @@ class OpenMeteo:
             else:
                 adjustment_factor = StatsManager.get_data("solar", "adjustment_factor") or 0.0
 
-            self.logger.log_debug(f"Solar adjustment_factor: {adjustment_factor}")
-            self.logger.log_debug(f"Solar raw current_hour data: {total_watts_current_hour} Wh")
+            self.logger.log_debug("Solar adjustment_factor: %s", adjustment_factor)
+            self.logger.log_debug("Solar raw current_hour data: %s Wh", total_watts_current_hour)
             self.logger.log_debug(
-                f"Solar raw current_day data: {(total_watt_hours_current_day * efficiency_inverter)} Wh")
+                "Solar raw current_day data: %s Wh", total_watt_hours_current_day * efficiency_inverter)
             self.logger.log_debug(
-                f"Solar raw tomorrow_day data: {(total_watt_hours_tomorrow_day * efficiency_inverter)} Wh")
+                "Solar raw tomorrow_day data: %s Wh", total_watt_hours_tomorrow_day * efficiency_inverter)
 
             total_watts_current_hour = (total_watts_current_hour * efficiency_inverter) * adjustment_factor
             solardata.update_total_current_hour(round(total_watts_current_hour, 2))
@@ -232,10 +232,10 @@ class OpenMeteo:
         damping = 1.0 - damping
 
         if damping == 0.0:
-            self.logger.log_debug(f"exponential_damping: hour {hour}, damping {1 + damping}, exponential damping 0.0")
+            self.logger.log_debug("exponential_damping: hour %s, damping %s, exponential damping 0.0", hour, 1 + damping)
             return 0.0  # Volle Dämpfung, daher ist der Dämpfungsfaktor immer 0
         elif damping == 1.0:
-            self.logger.log_debug(f"exponential_damping: hour {hour}, damping {1 - damping}, exponential damping 1.0")
+            self.logger.log_debug("exponential_damping: hour %s, damping %s, exponential damping 1.0", hour, 1 - damping)
             return 1.0  # Keine Dämpfung, daher ist der Dämpfungsfaktor immer 1
         else:
             # Berechnung des Dämpfungsfaktors basierend auf dem gewünschten Verhalten
@@ -251,5 +251,5 @@ class OpenMeteo:
                         (hour - self.start_hour) / (self.noon_hour - self.start_hour))
 
             self.logger.log_debug(
-                f"exponential_damping: hour {hour}, damping {damping}, exponential damping {exponential_damping}")
+                "exponential_damping: hour %s, damping %s, exponential damping %s", hour, damping, exponential_damping)
             return exponential_damping
@@ -29,6 +29,7 @@ from datetime import datetime
 from core.statsmanager import StatsManager
 from core.timeutilities import TimeUtilities
 from core.log import CustomLogger
+from powerconsumption.loadprofile import LoadProfile
 
 
 class SolarBatteryCalculator:
@@ -87,7 +88,8 @@ class SolarBatteryCalculator:
             # verbrauch bis sonnenuntergang oder verbrauch bis sonnenaufgang wenn nacht
             self.logger.log_debug(
                 f"average_consumption {self.average_consumption} * available_hours: {available_hours}")
-            average_consumption = self.average_consumption * available_hours
+            average_consumption = LoadProfile.get_expected_wh(current_date, current_date + differenz,
+                                                              self.average_consumption)
             # restliche battery capazität über minimum soc
             remaining_battery_soc = self.solardata.soc - self.solardata.battery_minimum_soc_limit
 
@@ -26,63 +26,102 @@
 #
 
 # item.py
-from decimal import Decimal, getcontext
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import datetime, timezone
 from core.timeutilities import TimeUtilities
-from core.log import CustomLogger
+
+
+# Alle Preise werden als Ganzzahl in 10^-14 Cent pro kWh gespeichert
+PRICE_POTENCY = 14
+PRICE_SCALE = 10 ** PRICE_POTENCY
 
 
 class Item:
-    def __init__(self, starttime, endtime, price, potency=14):
-        self.starttime = starttime
-        self.endtime = endtime - timedelta(seconds=1) if endtime is not None else None
-        self.price = self.convert_to_millicents(price, potency)
-        self.logger = CustomLogger()
+    """Unveränderlicher Preis-Slot: Start als Epoch-Sekunden, Dauer in Sekunden und ganzzahliger Preis."""
+    __slots__ = ('start', 'duration', 'price')
+
+    def __init__(self, starttime, endtime, price, potency=PRICE_POTENCY):
+        start = self.to_epoch(starttime)
+        object.__setattr__(self, 'start', start)
+        object.__setattr__(self, 'duration', self.to_epoch(endtime) - start if endtime is not None else None)
+        object.__setattr__(self, 'price', self.convert_to_millicents(price, potency))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
     @staticmethod
-    def convert_to_millicents(euro, potency=14):
+    def to_epoch(dt):
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp())
+
+    @property
+    def starttime(self):
+        return datetime.fromtimestamp(self.start, timezone.utc)
+
+    @property
+    def endtime(self):
+        # Wie bisher endet ein Slot eine Sekunde vor dem Beginn des nächsten
+        end = self.get_end_epoch()
+        return datetime.fromtimestamp(end, timezone.utc) if end is not None else None
+
+    @staticmethod
+    def convert_to_millicents(euro, potency=PRICE_POTENCY):
         try:
             # Ersetzen Sie Kommas durch Punkte
-            euro = str(euro).replace(',', '.')
+            euro = str(euro).replace(',', '.').strip()
 
-            getcontext().prec = 30
+            mantissa, separator, exponent = euro.lower().partition('e')
+            integer, _, fraction = mantissa.partition('.')
+            digits = int(integer + fraction)
+            shift = potency + (int(exponent) if separator else 0) - len(fraction)
 
-            millicents = int(Decimal(euro) * Decimal(10) ** potency)
-            return int(millicents)
+            # Nachkommastellen jenseits der Auflösung werden abgeschnitten (Richtung 0)
+            millicents = abs(digits) * 10 ** shift if shift >= 0 else abs(digits) // 10 ** -shift
+            return -millicents if integer.startswith('-') else millicents
         except ValueError:
             print(f"Fehler beim Umrechnen des Preises: {euro}")
             return None
 
     @staticmethod
     def millicent_to_cent(price):
-        potency = 14
         try:
-            getcontext().prec = 30
+            price = int(price)
+
+            # Auf 4 Nachkommastellen runden, genau .5 auf die gerade Ziffer (wie zuvor mit Decimal)
+            cent, remainder = divmod(abs(price), PRICE_SCALE // 10 ** 4)
+            half = PRICE_SCALE // 10 ** 4 // 2
+            if remainder > half or (remainder == half and cent % 2):
+                cent += 1
 
-            cent = Decimal(price) / Decimal(10 ** potency)
-            return "{:.4f}".format(cent)
+            sign = "-" if price < 0 else ""
+            return f"{sign}{cent // 10 ** 4}.{cent % 10 ** 4:04d}"
         except (TypeError, ValueError):
             print(f"Fehler beim Umrechnen des Preises: {price}")
             return None
 
-    def is_expired(self, check_time=False):
-        now = datetime.utcnow().replace(tzinfo=timezone.utc)
-        now_local = TimeUtilities.convert_utc_to_local(now, False)
-        item_local = TimeUtilities.convert_utc_to_local(self.starttime, False)
+    @staticmethod
+    def to_cent(price, digits=4):
+        """Numeric counterpart of millicent_to_cent for calculations and charts."""
+        return round(price / PRICE_SCALE, digits) if price is not None else None
 
+    def is_expired(self, check_time=False):
         if check_time:
             # Vergleiche sowohl Datum als auch Uhrzeit
-            expired = item_local < now_local
-            self.logger.log_debug(f"Item expired: {expired}, now: {now_local}, item: {item_local}")
+            return self.start < time.time()
+
+        # Vergleiche nur das Datum: abgelaufen ist alles, was vor der lokalen Mitternacht beginnt
+        today = TimeUtilities.get_now().date()
+        return self.start < self.to_epoch(TimeUtilities.TZ.localize(datetime.combine(today, datetime.min.time())))
 
-        else:
-            # Vergleiche nur das Datum
-            expired = item_local.date() < now_local.date()
-            self.logger.log_debug(f"Item expired: {expired}, now: {now_local.date()}, item: {item_local.date()}")
+    def get_start_epoch(self):
+        return self.start
 
-        return expired
+    def get_end_epoch(self):
+        return self.start + self.duration - 1 if self.duration is not None else None
 
     def get_price(self, convert=True):
+        # Formatierung erst bei der Ausgabe, gerechnet wird mit dem ganzzahligen Preis
         if convert:
             return self.millicent_to_cent(self.price)
         return self.price
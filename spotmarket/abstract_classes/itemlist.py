@@ -28,12 +28,25 @@
 from core.config import Config
 from core.log import CustomLogger
 from design_patterns.factory.generic_loader_factory import GenericLoaderFactory
+from spotmarket.abstract_classes.item import Item
+from spotmarket.abstract_classes.priceseries import PriceSeries
 
+import itertools
+import time
 from datetime import datetime, timedelta, timezone
 from core.timeutilities import TimeUtilities
 
 class Itemlist:
+    # Prozessweit eindeutige Versionen: eine neue Liste an derselben Adresse kann keine alte Version wiederholen
+    versions = itertools.count(1)
+
     def __init__(self, items=None):
+        self.version = 0
+        self._series = None
+        self._series_version = None
+        self._day_bounds = None
+        self._day_slices = None
+        self._current_slot = None
         self.item_list = items if items is not None else []
         self.config = Config()
         self.logger = CustomLogger()
@@ -50,8 +63,65 @@ class Itemlist:
         )
         self.current_market_name = self.primary_market_name
 
+    @property
+    def item_list(self):
+        return self._item_list
+
+    @item_list.setter
+    def item_list(self, items):
+        self._item_list = items
+        self.version = next(Itemlist.versions)
+
     def add_item(self, item):
-        self.item_list.append(item)
+        self._item_list.append(item)
+        self.version = next(Itemlist.versions)
+
+    def get_series(self, item_list=None):
+        """Columnar price series of ``item_list``, cached for the own list until it changes."""
+        if item_list is not None and item_list is not self._item_list:
+            return PriceSeries(item_list)
+
+        if self._series_version != self.version:
+            self._series = PriceSeries(self._item_list)
+            self._series_version = self.version
+        return self._series
+
+    @staticmethod
+    def get_day_bounds():
+        """Local midnight of today and tomorrow as epoch seconds."""
+        today = TimeUtilities.get_now().date()
+        today_start = TimeUtilities.TZ.localize(datetime.combine(today, datetime.min.time()))
+        tomorrow_start = TimeUtilities.TZ.localize(datetime.combine(today + timedelta(days=1), datetime.min.time()))
+        return int(today_start.timestamp()), int(tomorrow_start.timestamp())
+
+    def get_cached_day_bounds(self):
+        """Like get_day_bounds, recalculated only when local midnight has passed."""
+        now = time.time()
+        if self._day_bounds is None or not self._day_bounds[0] <= now < self._day_bounds[1]:
+            self._day_bounds = self.get_day_bounds()
+        return self._day_bounds
+
+    def get_day_slices(self, series):
+        """Index ranges of today's and of all later items in ``series``."""
+        today_start, tomorrow_start = self.get_cached_day_bounds()
+        if self._day_slices is not None and self._day_slices[0] is series and self._day_slices[1] == today_start:
+            return self._day_slices[2]
+
+        slices = series.slice_between(today_start, tomorrow_start), series.slice_between(tomorrow_start)
+        if series is self._series:
+            self._day_slices = (series, today_start, slices)
+        return slices
+
+    def split_by_day(self, item_list):
+        """Splits ``item_list`` into today's and tomorrow's items, other items are dropped."""
+        today_items, tomorrow_items = [], []
+        for item in item_list:
+            result = self.is_today_or_tomorrow(item)
+            if result == 'today':
+                today_items.append(item)
+            elif result == 'tomorrow':
+                tomorrow_items.append(item)
+        return today_items, tomorrow_items
 
     @staticmethod
     def create_item_list(items=None):
@@ -83,13 +153,12 @@ class Itemlist:
             return False
 
         if check_hardcap:
-            try:
-                item_price = float(item.get_price())
-                if item_price > self.config.charging_price_hard_cap:
-                    return False
-            except (TypeError, ValueError):
+            hard_cap = Item.convert_to_millicents(self.config.charging_price_hard_cap)
+            if item.get_price(False) is None or hard_cap is None:
                 self.logger.log_error("is_valid_item: item_price > float(self.config.charging_price_hard_cap).")
                 return False
+            if item.get_price(False) > hard_cap:
+                return False
 
         return now < end_datetime.replace(tzinfo=timezone.utc) < midnight
 
@@ -128,8 +197,7 @@ class Itemlist:
             day = int(start_datetime.split(' ')[0].split('-')[2])  # Extrahiere tag
             start_hour = int(start_datetime.split(' ')[1].split(':')[0])  # Extrahiere die Stunde
 
-            price = item.get_price(convert=True)
-            price = float(price)
+            price = Item.to_cent(item.get_price(convert=False))
 
             # Teile die Stunden auf: 0 bis 23 für heute, 24 bis 47 für morgen
             if day < next_day:
@@ -143,16 +211,28 @@ class Itemlist:
 
         return today_data, today_hours, tomorrow_data, tomorrow_hours
 
-    def get_current_price(self, convert=False):
-        now = datetime.utcnow().replace(tzinfo=timezone.utc)
+    def get_current_item(self):
+        series = self.get_series()
+        now = time.time()
 
-        for item in self.item_list:
-            start_datetime = item.get_start_datetime().replace(tzinfo=timezone.utc)
-            end_datetime = item.get_end_datetime().replace(tzinfo=timezone.utc)
+        # Gemerkter Slot bleibt bis zu seinem Ende gültig
+        if self._current_slot is not None and self._current_slot[0] is series:
+            _, index, start, end = self._current_slot
+            if start < now < end:
+                return series.items[index]
 
-            # Überprüfen, ob das Item innerhalb der Start- und Endzeit liegt
-            if start_datetime < now < end_datetime:
-                return item.get_price(convert)
+        index = series.index_at(now)
+        if index is None:
+            self._current_slot = None
+            return None
+
+        self._current_slot = (series, index, series.starts[index], series.ends[index])
+        return series.items[index]
+
+    def get_current_price(self, convert=False):
+        item = self.get_current_item()
+        if item is not None:
+            return item.get_price(convert)
 
         self.logger.log_error("get_current_price -> Item not found.")
         return None
@@ -166,81 +246,46 @@ class Itemlist:
 #        return round(total_prices / len(self.item_list), 4) if self.item_list else 0.0
 
     def get_average_price_by_date(self, convert=False):
-        today_items, tomorrow_items = [], []
-        for item in self.item_list:
-            result = self.is_today_or_tomorrow(item)
-            if result == 'today':
-                today_items.append(item)
-            elif result == 'tomorrow':
-                tomorrow_items.append(item)
+        series = self.get_series()
 
-        def calculate_average(items):
-            if not items:
+        def calculate_average(lo, hi):
+            if lo >= hi:
                 return None
-            total_prices = sum(float(item.get_price(convert)) for item in items)
+            total_prices = series.total(lo, hi)
             if convert:
-                return round(total_prices / len(items), 4)  # Durchschnitt mit Nachkommastellen
+                return Item.to_cent(total_prices / (hi - lo))  # Durchschnitt mit Nachkommastellen
 
-            return int(total_prices // len(items))  # Ganzzahldivision für Durchschnitt
+            return int(total_prices // (hi - lo))  # Ganzzahldivision für Durchschnitt
 
-        average_today = calculate_average(today_items)
-        average_tomorrow = calculate_average(tomorrow_items)
+        today, tomorrow = self.get_day_slices(series)
+        average_today = calculate_average(*today)
+        average_tomorrow = calculate_average(*tomorrow)
 
         return average_today, average_tomorrow
 
     def get_lowest_prices(self, count, item_list=None):
-        if item_list is None:
-            item_list = self.item_list
-
         if isinstance(count, int):
-            today_items, tomorrow_items = [], []
-            for item in item_list:
-                result = self.is_today_or_tomorrow(item)
-                if result == 'today':
-                    today_items.append(item)
-                elif result == 'tomorrow':
-                    tomorrow_items.append(item)
-
-            # Die Anzahl von 'count' Items für heute
-            today_sorted = sorted(today_items, key=lambda x: x.get_price(False))[:count]
-            # Die Anzahl von 'count' Items für morgen (falls vorhanden)
-            tomorrow_sorted = sorted(tomorrow_items, key=lambda x: x.get_price(False))[:count]
+            series = self.get_series(item_list)
+            today, tomorrow = self.get_day_slices(series)
 
-            # Heute und morgen zusammenführen
-            total_items = today_sorted + tomorrow_sorted
+            # Die Anzahl von 'count' Items für heute und morgen, nach dem Startzeitpunkt sortiert
+            return series.get_items(series.lowest(*today, count) + series.lowest(*tomorrow, count))
 
-            # Sortiere alle Items nach dem Startzeitpunkt
-            total_items = sorted(total_items, key=lambda x: x.get_start_datetime())
-
-            return total_items
+        if item_list is None:
+            item_list = self.item_list
 
         return self._get_prices_relative_to_average(count, item_list)
 
     def get_highest_prices(self, count, item_list=None):
-        if item_list is None:
-            item_list = self.item_list
-
         if isinstance(count, int):
-            today_items, tomorrow_items = [], []
-            for item in item_list:
-                result = self.is_today_or_tomorrow(item)
-                if result == 'today':
-                    today_items.append(item)
-                elif result == 'tomorrow':
-                    tomorrow_items.append(item)
+            series = self.get_series(item_list)
+            today, tomorrow = self.get_day_slices(series)
 
-            # Die Anzahl von 'count' Items für heute (höchste Preise)
-            today_sorted = sorted(today_items, key=lambda x: x.get_price(False), reverse=True)[:count]
-            # Die Anzahl von 'count' Items für morgen (höchste Preise)
-            tomorrow_sorted = sorted(tomorrow_items, key=lambda x: x.get_price(False), reverse=True)[:count]
+            # Die Anzahl von 'count' Items für heute und morgen (höchste Preise), nach dem Startzeitpunkt sortiert
+            return series.get_items(series.highest(*today, count) + series.highest(*tomorrow, count))
 
-            # Heute und morgen zusammenführen
-            total_items = today_sorted + tomorrow_sorted
-
-            # Sortiere alle Items nach dem Startzeitpunkt
-            total_items = sorted(total_items, key=lambda x: x.get_start_datetime())
-
-            return total_items
+        if item_list is None:
+            item_list = self.item_list
 
         return self._get_prices_relative_to_average(count, item_list)
 
@@ -272,23 +317,16 @@ class Itemlist:
 #        return item.get_start_datetime() < today_end
 
     def is_today_or_tomorrow(self, item):
-        # Berechne das Start- und Enddatum für heute
-        today_start = TimeUtilities.get_now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start.replace(hour=23, minute=59, second=59)
-
-        # Berechne das Startdatum für morgen
-        tomorrow_start = today_start + timedelta(days=1)
-
-        # Holen des Startdatums des Items
-        item_start = TimeUtilities.convert_utc_to_local(item.get_start_datetime(), False)
+        today_start, tomorrow_start = self.get_cached_day_bounds()
+        item_start = self.get_series().get_start_epoch(item)
 
         # Prüfe, ob das Item heute, morgen oder in der Zukunft liegt
-        if today_start <= item_start <= today_end:
+        if item_start is None or item_start < today_start:
+            return None  # In allen anderen Fällen (z.B. gestern oder ungültig)
+        elif item_start < tomorrow_start:
             return 'today'  # Das Item ist heute
-        elif tomorrow_start <= item_start:
-            return 'tomorrow'  # Das Item ist morgen
         else:
-            return None  # In allen anderen Fällen (z.B. gestern oder ungültig)
+            return 'tomorrow'  # Das Item ist morgen
 
     def _get_prices_relative_to_average(self, percentage, item_list):
         # Durchschnittspreis für heute und morgen abrufen
@@ -306,22 +344,20 @@ class Itemlist:
                 return average_price * _percentage
 
         relevant_items = []
+        series = self.get_series(item_list)
+        today, tomorrow = self.get_day_slices(series)
 
-        # Über alle Items iterieren
-        for item in item_list:
-            result = self.is_today_or_tomorrow(item)
-            if result == 'today':
-                threshold_price = calculate_threshold(average_today, percentage)
-            elif result == 'tomorrow':
-                threshold_price = calculate_threshold(average_tomorrow, percentage)
-            else:
-                continue  # Wenn das Item weder heute noch morgen ist, überspringen
+        for (lo, hi), average_price in ((today, average_today), (tomorrow, average_tomorrow)):
+            if average_price is None:
+                continue
 
-            item_price = float(item.get_price(False))
-            # Wenn der Preis dem Schwellenwert entspricht, hinzufügen
-            if (percentage >= 1.0 and item_price > threshold_price) or \
-                    (percentage < 1.0 and item_price < threshold_price):
-                relevant_items.append(item)
+            threshold_price = calculate_threshold(average_price, percentage)
+            for index in range(lo, hi):
+                item_price = series.prices[index]
+                # Wenn der Preis dem Schwellenwert entspricht, hinzufügen
+                if (percentage >= 1.0 and item_price > threshold_price) or \
+                        (percentage < 1.0 and item_price < threshold_price):
+                    relevant_items.append(series.items[index])
 
         # Debug-Ausgabe für relevante Items
         self.logger.log_debug(f"Relevant Items: {len(relevant_items)}")
@@ -367,7 +403,9 @@ class Itemlist:
     #        return relevant_items
 
     def remove_expired_items(self):
-        self.item_list = [item for item in self.item_list if not item.is_expired()]
+        # Entspricht Item.is_expired(), die lokale Mitternacht wird aber nur einmal berechnet
+        today_start, _ = self.get_cached_day_bounds()
+        self.item_list = [item for item in self.item_list if item.get_start_epoch() >= today_start]
 
     def log_items(self):
         for item in self.get_current_list():
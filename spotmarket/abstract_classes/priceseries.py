@@ -0,0 +1,80 @@
+#  -*- coding: utf-8 -*-
+#
+#  MIT License
+#
+#  Copyright (c) 2024-2025 Christian Kvasny chris(at)ckvsoft.at
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+#
+#  Project: [SEUSS -> Smart Ess Unit Spotmarket Switcher
+#
+
+
+# priceseries.py
+import heapq
+from array import array
+from bisect import bisect_left
+
+
+class PriceSeries:
+    """Columnar view of a price list: start/end epochs and integer prices, sorted by start time."""
+
+    def __init__(self, items):
+        self.items = sorted((item for item in items if item.get_price(False) is not None),
+                            key=lambda x: x.get_start_epoch())
+        self.starts = array('q', (item.get_start_epoch() for item in self.items))
+        self.ends = array('q', (item.get_end_epoch() if item.get_end_epoch() is not None
+                                else start + 3599 for item, start in zip(self.items, self.starts)))
+        self.prices = array('q', (item.get_price(False) for item in self.items))
+        self.positions = {id(item): index for index, item in enumerate(self.items)}
+
+    def __len__(self):
+        return len(self.items)
+
+    def get_start_epoch(self, item):
+        index = self.positions.get(id(item))
+        if index is not None and self.items[index] is item:
+            return self.starts[index]
+
+        return item.get_start_epoch()
+
+    def slice_between(self, start_epoch, end_epoch=None):
+        """Index range (lo, hi) of all items starting in [start_epoch, end_epoch)."""
+        lo = bisect_left(self.starts, start_epoch)
+        hi = len(self.starts) if end_epoch is None else bisect_left(self.starts, end_epoch, lo)
+        return lo, hi
+
+    def index_at(self, epoch):
+        """Index of the item running at ``epoch`` (start < epoch < end), None if there is none."""
+        index = bisect_left(self.starts, epoch) - 1
+        if index >= 0 and epoch < self.ends[index]:
+            return index
+        return None
+
+    def lowest(self, lo, hi, count):
+        return heapq.nsmallest(count, range(lo, hi), key=self.prices.__getitem__)
+
+    def highest(self, lo, hi, count):
+        return heapq.nlargest(count, range(lo, hi), key=self.prices.__getitem__)
+
+    def total(self, lo, hi):
+        return sum(self.prices[lo:hi])
+
+    def get_items(self, indices):
+        return [self.items[index] for index in sorted(indices)]
@@ -38,6 +38,8 @@ from spotmarket.abstract_classes.marketdata import MarketData
 
 
 class AwattarItem(Item):
+    __slots__ = ()
+
     def __init__(self, start_timestamp, end_timestamp, price):
         starttime = datetime.fromtimestamp(start_timestamp / 1000).astimezone(timezone.utc)
         endtime = datetime.fromtimestamp(end_timestamp / 1000).astimezone(timezone.utc)
@@ -39,6 +39,8 @@ from core.statsmanager import StatsManager
 
 
 class EntsoeItem(Item):
+    __slots__ = ()
+
     def __init__(self, start_datetime, end_datetime, price):
         start_time = start_datetime.replace(tzinfo=timezone.utc)  # .astimezone(timezone.utc)
         end_time = end_datetime.replace(tzinfo=timezone.utc)  # .astimezone(timezone.utc)
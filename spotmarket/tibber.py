@@ -38,19 +38,16 @@ from spotmarket.abstract_classes.marketdata import MarketData
 
 
 class TibberItem(Item):
+    __slots__ = ()
+
     def __init__(self, starts_at, price_unit):
         start_time = datetime.strptime(starts_at, '%Y-%m-%dT%H:%M:%S.%f%z').astimezone(timezone.utc)
         if price_unit is not None:
-            super().__init__(start_time, None, price_unit, 15)
+            # Tibber liefert nur den Beginn, ein Slot dauert eine Stunde
+            super().__init__(start_time, start_time + timedelta(hours=1), price_unit, 15)
         else:
             raise ValueError("Ungültige Tibber-Preisdaten. 'price_unit' muss gesetzt sein.")
 
-    def extend_endtime(self):
-        # Verlängere die Endzeit um eine Stunde
-        if self.endtime is None:
-            extended_endtime = self.starttime + timedelta(hours=1) - timedelta(seconds=1)
-            self.endtime = extended_endtime  # .strftime('%Y-%m-%dT%H:%M:%S.%f%z')
-
 
 class Tibber(MarketData):
     def __init__(self, **kwargs) -> None:
@@ -95,7 +92,6 @@ class Tibber(MarketData):
             for entry in data.get('data', {}).get('viewer', {}).get('homes', [])[0].get('currentSubscription', {}).get(
                     'priceInfo', {}).get('today', []):
                 tibber_item = TibberItem(entry.get('startsAt'), entry.get(self.price_unit))
-                tibber_item.extend_endtime()
                 items.append(tibber_item)
 
             if self.use_second_day:
@@ -103,7 +99,6 @@ class Tibber(MarketData):
                                                                                             {}).get(
                     'priceInfo', {}).get('tomorrow', []):
                     tibber_item = TibberItem(entry.get('startsAt'), entry.get(self.price_unit))
-                    tibber_item.extend_endtime()
                     items.append(tibber_item)
 
                 if len(items) < 25:
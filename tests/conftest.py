@@ -0,0 +1,36 @@
+#  -*- coding: utf-8 -*-
+#
+#  MIT License
+#
+#  Copyright (c) 2024-2025 Christian Kvasny chris(at)ckvsoft.at
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+#
+#  Project: [SEUSS -> Smart Ess Unit Spotmarket Switcher
+
+import json
+import os
+import sys
+import tempfile
+
+# Config und StatsManager legen ihre Dateien neben dem Hauptskript ab, für die Tests in ein eigenes Verzeichnis
+_workdir = tempfile.mkdtemp(prefix='seuss-tests-')
+sys.argv[0] = os.path.join(_workdir, 'seuss.py')
+with open(os.path.join(_workdir, 'config.json'), 'w') as _file:
+    json.dump({'log_file_path': os.path.join(_workdir, 'seuss.log')}, _file)
@@ -0,0 +1,145 @@
+#  -*- coding: utf-8 -*-
+#
+#  MIT License
+#
+#  Copyright (c) 2024-2025 Christian Kvasny chris(at)ckvsoft.at
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+#
+#  Project: [SEUSS -> Smart Ess Unit Spotmarket Switcher
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.timeutilities import TimeUtilities
+from spotmarket.abstract_classes.item import Item
+from spotmarket.abstract_classes.itemlist import Itemlist
+
+
+# Bisherige Implementierung ohne PriceSeries als Referenz für die Ergebnisse
+
+def old_is_today_or_tomorrow(item):
+    today_start = TimeUtilities.get_now().replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = today_start.replace(hour=23, minute=59, second=59)
+    tomorrow_start = today_start + timedelta(days=1)
+    item_start = TimeUtilities.convert_utc_to_local(item.get_start_datetime(), False)
+
+    if today_start <= item_start <= today_end:
+        return 'today'
+    elif tomorrow_start <= item_start:
+        return 'tomorrow'
+    return None
+
+
+def old_split_by_day(item_list):
+    today_items = [item for item in item_list if old_is_today_or_tomorrow(item) == 'today']
+    tomorrow_items = [item for item in item_list if old_is_today_or_tomorrow(item) == 'tomorrow']
+    return today_items, tomorrow_items
+
+
+def old_extreme_prices(item_list, count, reverse):
+    today_items, tomorrow_items = old_split_by_day(item_list)
+    today_sorted = sorted(today_items, key=lambda x: x.get_price(False), reverse=reverse)[:count]
+    tomorrow_sorted = sorted(tomorrow_items, key=lambda x: x.get_price(False), reverse=reverse)[:count]
+    return sorted(today_sorted + tomorrow_sorted, key=lambda x: x.get_start_datetime())
+
+
+def old_average_price_by_date(item_list):
+    def calculate_average(items):
+        if not items:
+            return None
+        return int(sum(item.get_price(False) for item in items) // len(items))
+
+    today_items, tomorrow_items = old_split_by_day(item_list)
+    return calculate_average(today_items), calculate_average(tomorrow_items)
+
+
+def old_current_price(item_list):
+    now = datetime.now(timezone.utc)
+    for item in item_list:
+        start = item.get_start_datetime().replace(tzinfo=timezone.utc)
+        end = item.get_end_datetime().replace(tzinfo=timezone.utc)
+        if start < now < end:
+            return item.get_price(False)
+    return None
+
+
+def make_items(seed, minutes=60, shuffle=False):
+    """Slots from yesterday until the end of tomorrow (local time), prices with duplicates."""
+    rng = random.Random(seed)
+    midnight = TimeUtilities.TZ.localize(datetime.combine(TimeUtilities.get_now().date(), datetime.min.time()))
+    start = midnight.astimezone(timezone.utc) - timedelta(days=1)
+    items = []
+    for slot in range(3 * 24 * 60 // minutes):
+        begin = start + timedelta(minutes=slot * minutes)
+        items.append(Item(begin, begin + timedelta(minutes=minutes), f"0.{rng.randint(0, 40):03d}"))
+    if shuffle:
+        rng.shuffle(items)
+    return items
+
+
+@pytest.mark.parametrize('seed, minutes', [(1, 60), (2, 60), (3, 15)])
+def test_slicing_matches_old_results(seed, minutes):
+    items = make_items(seed, minutes)
+    item_list = Itemlist(list(items))
+
+    assert item_list.split_by_day(items) == old_split_by_day(items)
+    assert item_list.get_average_price_by_date() == old_average_price_by_date(items)
+    assert item_list.get_current_price(False) == old_current_price(items)
+    for count in (0, 1, 3, 8, 100):
+        assert item_list.get_lowest_prices(count) == old_extreme_prices(items, count, False)
+        assert item_list.get_highest_prices(count) == old_extreme_prices(items, count, True)
+
+
+def test_slicing_of_foreign_and_unsorted_lists():
+    items = make_items(4, shuffle=True)
+    # Eindeutige Preise, damit die Reihenfolge gleicher Preise keine Rolle spielt
+    items = [Item(item.get_start_datetime(), item.get_end_datetime(), f"0.{index:03d}")
+             for index, item in enumerate(items)]
+    item_list = Itemlist(make_items(5))
+
+    for count in (1, 5, 30):
+        assert item_list.get_lowest_prices(count, items) == old_extreme_prices(items, count, False)
+        assert item_list.get_highest_prices(count, items) == old_extreme_prices(items, count, True)
+
+
+def test_cached_slices_follow_list_changes():
+    items = make_items(6)
+    item_list = Itemlist(items[:40])
+    assert item_list.get_lowest_prices(4) == old_extreme_prices(items[:40], 4, False)
+
+    item_list.item_list = list(items)
+    assert item_list.get_lowest_prices(4) == old_extreme_prices(items, 4, False)
+
+    extra = Item(items[-1].get_start_datetime() + timedelta(hours=1), items[-1].get_start_datetime() + timedelta(hours=2), "-0.5")
+    item_list.add_item(extra)
+    assert extra in item_list.get_lowest_prices(1)
+    assert item_list.get_average_price_by_date() == old_average_price_by_date(items + [extra])
+
+
+def test_versions_are_unique_across_lists():
+    first = Itemlist(make_items(7))
+    second = Itemlist(make_items(7))
+    assert first.version != second.version
+
+    version = second.version
+    second.add_item(make_items(8)[0])
+    assert second.version > version
@@ -0,0 +1,147 @@
+#  -*- coding: utf-8 -*-
+#
+#  MIT License
+#
+#  Copyright (c) 2024-2025 Christian Kvasny chris(at)ckvsoft.at
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+#
+#  Project: [SEUSS -> Smart Ess Unit Spotmarket Switcher
+
+import os
+
+from core.logreader import LogTail
+
+
+def append(path, text):
+    with open(path, 'a') as file:
+        file.write(text)
+
+
+def test_cursor_returns_only_new_lines(tmp_path):
+    path = str(tmp_path / 'seuss.log')
+    append(path, "[I] one\n[I] two\n")
+    tail = LogTail(path)
+
+    assert tail.poll() == 2
+    cursor = tail.get_cursor()
+    assert tail.get_lines_since(cursor) == ([], cursor, False)
+
+    append(path, "[I] three\n")
+    assert tail.poll() == 1
+    lines, new_cursor, reset = tail.get_lines_since(cursor)
+    assert lines == ["[I] three\n"]
+    assert not reset
+    assert new_cursor == tail.get_cursor() != cursor
+
+
+def test_partial_line_waits_for_newline(tmp_path):
+    path = str(tmp_path / 'seuss.log')
+    append(path, "[I] one\n[I] tw")
+    tail = LogTail(path)
+
+    assert tail.poll() == 1
+    append(path, "o\n")
+    assert tail.poll() == 1
+    assert tail.get_lines() == ["[I] one\n", "[I] two\n"]
+
+
+def test_unknown_cursor_resets(tmp_path):
+    path = str(tmp_path / 'seuss.log')
+    append(path, "[I] one\n")
+    tail = LogTail(path)
+    tail.poll()
+
+    for cursor in (None, "", "garbage", "0:99", "7:0"):
+        lines, _, reset = tail.get_lines_since(cursor)
+        assert reset
+        assert lines == ["[I] one\n"]
+
+
+def test_program_start_begins_new_session(tmp_path):
+    path = str(tmp_path / 'seuss.log')
+    append(path, "[I] old run\n")
+    tail = LogTail(path)
+    tail.poll()
+    cursor = tail.get_cursor()
+
+    append(path, "[I] SEUSS started...\n[I] new run\n")
+    tail.poll()
+
+    lines, _, reset = tail.get_lines_since(cursor)
+    assert reset
+    assert lines == ["[I] SEUSS started...\n", "[I] new run\n"]
+
+
+def test_rotation_reads_rest_of_old_file(tmp_path):
+    path = str(tmp_path / 'seuss.log')
+    append(path, "[I] one\n")
+    tail = LogTail(path)
+    tail.poll()
+    cursor = tail.get_cursor()
+
+    # Der Handler schreibt noch in die alte Datei, bevor er rotiert
+    append(path, "[I] two\n")
+    os.rename(path, path + '.1')
+    append(path, "[I] three\n")
+
+    assert tail.poll() == 2
+    lines, _, reset = tail.get_lines_since(cursor)
+    assert lines == ["[I] two\n", "[I] three\n"]
+    assert not reset
+
+
+def test_truncated_file_is_read_from_start(tmp_path):
+    path = str(tmp_path / 'seuss.log')
+    append(path, "[I] a rather long first line\n")
+    tail = LogTail(path)
+    tail.poll()
+
+    with open(path, 'w') as file:
+        file.write("[I] short\n")
+
+    assert tail.poll() == 1
+    assert tail.get_lines()[-1] == "[I] short\n"
+
+
+def test_dropped_lines_invalidate_old_cursor(tmp_path):
+    path = str(tmp_path / 'seuss.log')
+    tail = LogTail(path, max_lines=3)
+    append(path, "[I] 1\n")
+    tail.poll()
+    cursor = tail.get_cursor()
+
+    append(path, "[I] 2\n[I] 3\n[I] 4\n[I] 5\n")
+    tail.poll()
+
+    lines, _, reset = tail.get_lines_since(cursor)
+    assert reset
+    assert lines == ["[I] 3\n", "[I] 4\n", "[I] 5\n"]
+
+
+def test_missing_file_reports_error(tmp_path):
+    path = str(tmp_path / 'missing.log')
+    tail = LogTail(path)
+
+    assert tail.poll() == 0
+    assert tail.get_lines() == ["Log file not found."]
+
+    append(path, "[I] one\n")
+    assert tail.poll() == 1
+    assert tail.get_lines() == ["[I] one\n"]
@@ -0,0 +1,149 @@
+#  -*- coding: utf-8 -*-
+#
+#  MIT License
+#
+#  Copyright (c) 2024-2025 Christian Kvasny chris(at)ckvsoft.at
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+#
+#  Project: [SEUSS -> Smart Ess Unit Spotmarket Switcher
+
+import time
+from datetime import datetime, timedelta
+
+from core.scheduler import Scheduler
+
+
+def every(seconds):
+    return lambda now: now + timedelta(seconds=seconds)
+
+
+def test_job_runs_when_due_and_is_rescheduled():
+    scheduler = Scheduler()
+    calls = []
+    scheduler.add_job('job', lambda: calls.append(time.monotonic()), every(0.05))
+
+    assert 0 < scheduler.time_until_next() <= 0.05
+    assert scheduler.run_pending() == 0
+
+    time.sleep(0.06)
+    assert scheduler.run_pending() == 1
+    assert len(calls) == 1
+    assert scheduler.get_next_run('job') > datetime.now()
+    assert scheduler.run_pending() == 0
+
+
+def test_run_now_runs_on_next_pass():
+    scheduler = Scheduler()
+    calls = []
+    scheduler.add_job('job', lambda: calls.append(1), every(3600), run_now=True)
+
+    assert scheduler.time_until_next() == 0.0
+    assert scheduler.run_pending() == 1
+    assert calls == [1]
+    assert scheduler.time_until_next() > 3500
+
+
+def test_overdue_job_catches_up_once():
+    scheduler = Scheduler()
+    calls = []
+    due_times = iter([datetime.now() - timedelta(minutes=10)])
+
+    def next_run(now):
+        return next(due_times, now + timedelta(hours=1))
+
+    scheduler.add_job('job', lambda: calls.append(1), next_run)
+
+    assert scheduler.run_pending() == 1
+    assert calls == [1]
+    assert scheduler.get_next_run('job') > datetime.now() + timedelta(minutes=59)
+
+
+def test_reschedule_replaces_pending_due_time():
+    scheduler = Scheduler()
+    calls = []
+    interval = {'seconds': 3600}
+    scheduler.add_job('job', lambda: calls.append(1), lambda now: now + timedelta(seconds=interval['seconds']))
+
+    interval['seconds'] = 0.01
+    scheduler.reschedule('job')
+    assert scheduler.time_until_next() <= 0.01
+
+    time.sleep(0.02)
+    interval['seconds'] = 3600
+    assert scheduler.run_pending() == 1
+    assert calls == [1]
+
+
+def test_reschedule_unknown_job_is_ignored():
+    scheduler = Scheduler()
+    scheduler.reschedule('missing')
+
+    assert scheduler.time_until_next() is None
+
+
+def test_add_job_with_same_name_replaces_job():
+    scheduler = Scheduler()
+    calls = []
+    scheduler.add_job('job', lambda: calls.append('old'), every(3600), run_now=True)
+    scheduler.add_job('job', lambda: calls.append('new'), every(3600), run_now=True)
+
+    assert scheduler.run_pending() == 1
+    assert calls == ['new']
+
+
+def test_remove_job():
+    scheduler = Scheduler()
+    calls = []
+    scheduler.add_job('job', lambda: calls.append(1), every(3600), run_now=True)
+    scheduler.remove_job('job')
+
+    assert scheduler.time_until_next() is None
+    assert scheduler.run_pending() == 0
+    assert scheduler.get_next_run('job') is None
+    assert calls == []
+
+
+def test_failing_job_is_rescheduled():
+    scheduler = Scheduler()
+
+    def fail():
+        raise ValueError("boom")
+
+    scheduler.add_job('job', fail, every(3600), run_now=True)
+
+    assert scheduler.run_pending() == 1
+    assert scheduler.time_until_next() > 3500
+
+
+def test_jobs_run_in_due_order():
+    scheduler = Scheduler()
+    calls = []
+    now = datetime.now()
+
+    def once_at(due):
+        due_times = iter([due])
+        return lambda reference: next(due_times, reference + timedelta(hours=1))
+
+    scheduler.add_job('late', lambda: calls.append('late'), once_at(now + timedelta(seconds=0.04)))
+    scheduler.add_job('early', lambda: calls.append('early'), once_at(now + timedelta(seconds=0.02)))
+
+    time.sleep(0.05)
+    assert scheduler.run_pending() == 2
+    assert calls == ['early', 'late']
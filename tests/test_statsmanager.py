@@ -0,0 +1,146 @@
+#  -*- coding: utf-8 -*-
+#
+#  MIT License
+#
+#  Copyright (c) 2024-2025 Christian Kvasny chris(at)ckvsoft.at
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+#
+#  Project: [SEUSS -> Smart Ess Unit Spotmarket Switcher
+
+import json
+
+import pytest
+
+from core.statsmanager import StatsManager
+
+
+@pytest.fixture
+def stats(tmp_path, monkeypatch):
+    """StatsManager with its files in a temporary directory and a fresh class state."""
+    StatsManager.close_journal()
+    monkeypatch.setattr(StatsManager, 'file_path', str(tmp_path / 'status.json'))
+    monkeypatch.setattr(StatsManager, 'journal_path', str(tmp_path / 'status.journal'))
+    monkeypatch.setattr(StatsManager, 'data', {})
+    monkeypatch.setattr(StatsManager, 'dirty', {})
+    monkeypatch.setattr(StatsManager, 'loaded', False)
+    monkeypatch.setattr(StatsManager, 'journal_entries', 0)
+    yield StatsManager
+    if StatsManager.flush_timer is not None:
+        StatsManager.flush_timer.cancel()
+        StatsManager.flush_timer = None
+    StatsManager.close_journal()
+
+
+def restart(stats):
+    """Simulates a new process: drops everything that is only held in memory."""
+    stats.close_journal()
+    stats.data = {}
+    stats.dirty = {}
+    stats.loaded = False
+
+
+def test_running_average_over_several_calls(stats):
+    with open(stats.file_path, 'w') as file:
+        json.dump({'powerconsumption': {'hourly_watt_average': [22.0, 4]}}, file)
+
+    for value in (10, 20, 30, 40):
+        stats.update_percent_status_data('powerconsumption', 'hourly_watt_average', value)
+
+    value, count = stats.get_data('powerconsumption', 'hourly_watt_average')
+    assert round(value, 2) == 23.5
+    assert count == 8
+
+
+def test_running_average_accepts_tuple(stats):
+    stats.ensure_loaded()
+    stats.data['powerconsumption'] = {'daily_wh_average': (100.0, 1)}
+
+    assert stats.update_percent_status_data('powerconsumption', 'daily_wh_average', 200) == 150.0
+    assert stats.get_data('powerconsumption', 'daily_wh_average') == [150.0, 2]
+
+
+def test_journal_replay_restores_changes(stats):
+    stats.set_data('market', 'price', 0.12)
+    stats.update_percent_status_data('powerconsumption', 'hourly_watt_average', 300)
+    stats.update_percent_status_data('powerconsumption', 'hourly_watt_average', 500)
+    stats.set_data('market', 'gone', 1)
+    stats.remove_data('market', 'gone')
+    stats.flush()
+    expected = json.loads(json.dumps(stats.data))
+
+    restart(stats)
+    stats.ensure_loaded()
+
+    assert stats.data == expected
+    assert 'gone' not in stats.data['market']
+
+
+def test_journal_replay_on_top_of_snapshot(stats):
+    stats.set_data('market', 'price', 0.10)
+    stats.save_data()
+    stats.set_data('market', 'price', 0.20)
+    stats.flush()
+
+    restart(stats)
+    stats.ensure_loaded()
+
+    assert stats.get_data('market', 'price') == 0.20
+
+
+def test_replay_skips_incomplete_last_line(stats):
+    stats.set_data('market', 'price', 0.10)
+    stats.flush()
+    stats.close_journal()
+    with open(stats.journal_path, 'a') as file:
+        file.write('{"t":1,"g":"market","k":"pri')
+
+    restart(stats)
+    stats.ensure_loaded()
+
+    assert stats.get_data('market', 'price') == 0.10
+
+
+def test_flush_coalesces_and_snapshot_holds_averages(stats):
+    for value in (100, 200, 300, 400):
+        stats.update_percent_status_data('powerconsumption', 'hourly_watt_average', value)
+    stats.flush()
+
+    with open(stats.journal_path) as file:
+        entries = [json.loads(line) for line in file]
+    averages = [entry for entry in entries if entry['k'] == 'hourly_watt_average']
+    assert len(averages) == 1
+    assert averages[0]['v'] == stats.get_data('powerconsumption', 'hourly_watt_average')
+
+    stats.save_data()
+    with open(stats.file_path) as file:
+        snapshot = json.load(file)
+
+    value, count = snapshot['powerconsumption']['hourly_watt_average']
+    assert count == 5
+    assert round(value, 2) == 220.0
+    assert snapshot == json.loads(json.dumps(stats.data))
+
+
+def test_save_data_flushes_pending_changes_into_history(stats):
+    stats.set_data('market', 'price', 0.10)
+    stats.save_data()
+
+    assert stats.dirty == {}
+    assert [value for _, value in stats.get_history('market', 'price')] == [0.10]
@@ -42,6 +42,7 @@
     </script>
     <script>
         let ws; // Declare WebSocket globally
+        let powerState = {}; // Last known fields of the power channel
         let reconnectInterval = 5000; // Time (in ms) to wait before trying to reconnect
         let reconnectAttempts = 0; // Count of reconnection attempts
         const maxReconnectAttempts = 10; // Optional: Maximum reconnection attempts (or use infinite retries)
@@ -56,13 +57,24 @@
             ws.onopen = function () {
                 console.log('Connected to the WebSocket server');
                 reconnectAttempts = 0; // Reset reconnection attempts after successful connection
+                ws.send(JSON.stringify({action: 'subscribe', channel: 'power'}));
             };
 
             ws.onmessage = function (event) {
                 console.log('Message from server:', event.data);
 
                 try {
-                    const data = JSON.parse(event.data);
+                    const message = JSON.parse(event.data);
+                    if (message.channel !== 'power') {
+                        return;
+                    }
+
+                    // Snapshot beim Abonnieren, danach nur noch geänderte Felder
+                    if (message.reset) {
+                        powerState = {};
+                    }
+                    Object.assign(powerState, message.data);
+                    const data = powerState;
 
                     if (data.averageWh !== undefined) {
                         const averageWhElement = document.getElementById("averageWh");
@@ -85,7 +97,7 @@
 
                     const responseElement = document.getElementById("response");
                     if (responseElement) {
-                        responseElement.textContent = `Server response: ${event.data}`;
+                        responseElement.textContent = `Server response: ${JSON.stringify(data)}`;
                     }
                 } catch (error) {
                     console.error('Error processing server message:', error);
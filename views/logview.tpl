@@ -29,7 +29,11 @@
         <button onclick="manualRefresh()">Manuelles Refresh</button>
         <button onclick="downloadLog()">Download Log</button>
 
-        <form id="download-form" action="/download_log" method="post">
+        <form id="download-form" action="/download_log" method="post" style="display: inline-block;">
+            <label for="date_from">von</label>
+            <input type="date" id="date_from" name="date_from">
+            <label for="date_to">bis</label>
+            <input type="date" id="date_to" name="date_to">
         </form>
     </div>
 
@@ -43,9 +47,18 @@
             currentScrollTop = scroller.scrollTop;
         });
 
+        var logCursor = "";
+        var lastHideDebug = null;
+        var logSocket = null;
+        var logSocketActive = false;
+
+        function isHideDebug() {
+            const checkbox = document.getElementById('checkbox');
+            return checkbox ? checkbox.checked : false;
+        }
+
         function manualRefresh() {
-            const checkboxValue = document.getElementById('checkbox').checked;
-            updateLogContent(checkboxValue);
+            updateLogContent(isHideDebug());
         }
 
         function downloadLog() {
@@ -53,40 +66,105 @@
             document.forms["download-form"].submit();
         }
 
-        function updateLogContent(param) {
+        function applyLogLines(reset, html) {
             var logContainer = document.getElementById('log-container');
+            if (!reset && !html) {
+                return;
+            }
+
+            // Speichern des aktuellen Scrollwerts
+            const previousScrollTop = scroller.scrollTop;
+
+            // Aktualisieren des Inhalts
+            let paragraph = logContainer.querySelector("p");
+            if (reset || !paragraph) {
+                logContainer.innerHTML = "<p>" + html + "</p>";
+            } else {
+                paragraph.insertAdjacentHTML("beforeend", (paragraph.innerHTML ? "<br>" : "") + html);
+            }
+
+            // Wiederherstellen des vorherigen Scrollwerts
+            scroller.scrollTop = previousScrollTop;
+        }
+
+        function updateLogContent(param) {
+            // Bei geändertem Filter alles neu laden, sonst nur die neuen Zeilen holen
+            if (lastHideDebug !== param) {
+                logCursor = "";
+                lastHideDebug = param;
+            }
 
             // Konvertiere den Checkbox-Status in einen String
             const paramString = param ? 'true' : 'false';
 
             // Füge den Parameter zur URL hinzu
-            const url = `/update_log?hide_debug=${paramString}`;
+            const url = `/update_log?hide_debug=${paramString}&cursor=${encodeURIComponent(logCursor)}`;
 
             fetch(url)
                 .then(response => {
                     if (!response.ok) {
                         throw new Error('Network response was not ok');
                     }
-                    return response.text();
+                    return response.json();
                 })
                 .then(data => {
-                    // Speichern des aktuellen Scrollwerts
-                    const previousScrollTop = scroller.scrollTop;
-
-                    // Aktualisieren des Inhalts
-                    logContainer.innerHTML = "<p>" + data + "</p>";
-
-                    // Wiederherstellen des vorherigen Scrollwerts
-                    scroller.scrollTop = previousScrollTop;
+                    logCursor = data.cursor;
+                    applyLogLines(data.reset, data.html);
                 })
                 .catch(error => {
                     console.error('Fetch error:', error);
                 });
         }
 
+        // Neue Zeilen werden über den WebSocket gepusht, Polling nur solange keine Verbindung besteht
+        function subscribeLog() {
+            logSocket.send(JSON.stringify({action: 'subscribe', channel: 'log', level: isHideDebug() ? 'INFO' : 'DEBUG'}));
+        }
+
+        function connectLogSocket() {
+            const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+            logSocket = new WebSocket(`${protocol}//${window.location.hostname}:8765`);
+
+            logSocket.onopen = function () {
+                logSocketActive = true;
+                subscribeLog();
+            };
+
+            logSocket.onmessage = function (event) {
+                try {
+                    const data = JSON.parse(event.data);
+                    if (data.channel === 'log') {
+                        applyLogLines(data.reset, data.lines.join('<br>'));
+                    }
+                } catch (error) {
+                    console.error('Error processing server message:', error);
+                }
+            };
+
+            logSocket.onclose = function () {
+                logSocketActive = false;
+                lastHideDebug = null;
+                setTimeout(connectLogSocket, 5000);
+            };
+        }
+
+        const checkbox = document.getElementById('checkbox');
+        if (checkbox) {
+            checkbox.addEventListener("change", () => {
+                if (logSocketActive) {
+                    subscribeLog();
+                } else {
+                    manualRefresh();
+                }
+            });
+        }
+
+        connectLogSocket();
+
         setInterval(() => {
-            const checkboxValue = document.getElementById('checkbox').checked;
-            manualRefresh(checkboxValue);
+            if (!logSocketActive) {
+                manualRefresh();
+            }
         }, 2000);
 
     </script>